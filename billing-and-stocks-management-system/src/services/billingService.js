@@ -20,6 +20,24 @@ const billingService = {
     }
   },
 
+  lookupCustomers: async (params) => {
+    try {
+      const response = await api.get('/billing/customers/lookup', { params });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to look up customers' };
+    }
+  },
+
+  searchCustomers: async (name, params = {}) => {
+    try {
+      const response = await api.get('/billing/customers/search', { params: { ...params, name } });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to search customers' };
+    }
+  },
+
   createCustomer: async (customerData) => {
     try {
       const response = await api.post('/billing/customers', customerData);
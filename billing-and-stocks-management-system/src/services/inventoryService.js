@@ -66,6 +66,42 @@ const inventoryService = {
     }
   },
 
+  searchProducts: async (q, params = {}) => {
+    try {
+      const response = await api.get('/inventory/products/search', { params: { ...params, q } });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to search products' };
+    }
+  },
+
+  matchProducts: async (text, params = {}) => {
+    try {
+      const response = await api.post('/inventory/products/match', { text }, { params });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to match products' };
+    }
+  },
+
+  getProductByCode: async (code) => {
+    try {
+      const response = await api.get(`/inventory/products/by-code/${encodeURIComponent(code)}`);
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to get product' };
+    }
+  },
+
+  getProductsByCodes: async (codes) => {
+    try {
+      const response = await api.post('/inventory/products/by-code', { codes });
+      return response.data;
+    } catch (error) {
+      throw error.response?.data || { error: 'Failed to get products' };
+    }
+  },
+
   createProduct: async (productData) => {
     try {
       const response = await api.post('/inventory/products', productData);
@@ -1,41 +1,435 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required
 from app.models import Sale, SaleItem, Customer, Product, Purchase, PurchaseItem, Vendor
+from app.models.customer import normalize_phone
 from app import db
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
+from app.services.invoice_numbers import next_invoice_number, release_invoice_number
+from app.services.idempotency import idempotent, remember_response, replay_stored_response
+from app.services.pricing import gst_on, infer_gst_rates, price_cart, to_rupees
+from app.services.catalog import catalog_entries, invalidate_catalog
+from app.services.product_matcher import refresh_matcher
+from app.services.stock_ledger import movement, record_movements
+from app.services.rollups import record_purchases, record_sales
+from app.services.report_cache import SALES, PURCHASES, CUSTOMERS, invalidate_reports
+from app.api.pagination import filter_by_args, paginate, paginated_response, select_fields, stream_response, wants_stream
 from datetime import datetime
-import random
-import string
 
 billing_bp = Blueprint('billing', __name__)
 
+# Fields the list endpoints can be sorted by
+CUSTOMER_SORT_FIELDS = {'id': Customer.id, 'name': Customer.name, 'created_at': Customer.created_at}
+SALE_SORT_FIELDS = {
+    'id': Sale.id,
+    'invoice_number': Sale.invoice_number,
+    'sale_date': Sale.sale_date,
+    'total_amount': Sale.total_amount,
+    'created_at': Sale.created_at
+}
+
+# Fields the customer and sale listings can be narrowed to with ?fields=
+CUSTOMER_FIELDS = {
+    'id': Customer.id,
+    'name': Customer.name,
+    'phone': Customer.phone,
+    'email': Customer.email,
+    'address': Customer.address,
+    'gst_number': Customer.gst_number,
+    'created_at': Customer.created_at
+}
+SALE_FIELDS = {
+    'id': Sale.id,
+    'invoice_number': Sale.invoice_number,
+    'customer_id': Sale.customer_id,
+    'customer_name': func.coalesce(Customer.name, 'Walk-in Customer'),
+    'sale_date': Sale.sale_date,
+    'subtotal': Sale.subtotal,
+    'discount': Sale.discount,
+    'gst_amount': Sale.gst_amount,
+    'total_amount': Sale.total_amount,
+    'payment_status': Sale.payment_status,
+    'payment_method': Sale.payment_method,
+    'created_at': Sale.created_at
+}
+SALE_FIELD_JOINS = {'customer_name': (Customer, Sale.customer_id == Customer.id)}
+
+PURCHASE_SORT_FIELDS = {
+    'id': Purchase.id,
+    'purchase_date': Purchase.purchase_date,
+    'total_amount': Purchase.total_amount,
+    'created_at': Purchase.created_at
+}
+
 # Helper function to generate invoice number
-def generate_invoice_number(prefix='INV'):
-    """Generate a unique invoice number"""
-    timestamp = datetime.now().strftime('%Y%m%d%H%M')
-    random_str = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"{prefix}-{timestamp}-{random_str}"
+def generate_invoice_number(prefix='INV', on_date=None):
+    """Allocate the next invoice number in the financial year of on_date"""
+    return next_invoice_number(prefix, on_date)
+
+
+# Helper function to hand back the invoice number of a bill that was not saved
+def release_generated_invoice_number(invoice_number, data, on_date):
+    """Return an allocated invoice number for reuse; client-supplied numbers are left alone"""
+    if invoice_number and not data.get('invoice_number'):
+        release_invoice_number(invoice_number, on_date=on_date)
+
+
+# Helper function to check the shape of a cart
+def check_cart_items(items):
+    """Raise ValueError unless the cart items are a list of objects"""
+    if not isinstance(items, list) or not all(isinstance(item_data, dict) for item_data in items):
+        raise ValueError('Items must be a list of objects')
+
+
+# Helper function to collect the product IDs referenced by a cart
+def cart_product_ids(items):
+    """Return the integer product IDs referenced by a list of cart items"""
+    check_cart_items(items)
+    try:
+        return [int(item_data['product_id']) for item_data in items if item_data.get('product_id')]
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError('Product ID must be an integer')
+
+
+# Helper function to read the customer a bill refers to
+def sale_customer_id(sale_data):
+    """Return a bill's customer ID as an integer, or None for a walk-in sale"""
+    customer_id = sale_data.get('customer_id')
+    if not customer_id:
+        return None
+    try:
+        return int(customer_id)
+    except (TypeError, ValueError):
+        raise ValueError('Customer ID must be an integer')
+
+
+# Helper function to read a cart line's quantity
+def item_quantity(item_data):
+    """Return a cart line's quantity as a positive integer (1 when omitted)"""
+    quantity = item_data.get('quantity', 1)
+    # Whole numbers only, so pricing, the stored line and the stock decrement all use the same count
+    if isinstance(quantity, float) and quantity.is_integer():
+        quantity = int(quantity)
+    elif isinstance(quantity, str) and quantity.strip().isdigit():
+        quantity = int(quantity)
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError('Quantity must be a whole number greater than zero')
+    return quantity
+
+
+# Helper function to validate and price cart items
+def price_items(items, products, bill_discount=0, interstate=False):
+    """Validate cart items against preloaded products and price them in one pass.
+
+    ``products`` maps product ID to anything exposing selling_price and
+    gst_percentage. Returns the validated lines as (product_id, quantity,
+    unit_price, discount, gst_percentage) tuples together with their CartPrice;
+    raises ValueError with a client-facing message when an item is invalid.
+    """
+    check_cart_items(items)
+    lines = []
+    for item_data in items:
+        # Validate product
+        product_id = item_data.get('product_id')
+        if not product_id:
+            raise ValueError('Product ID is required for each item')
+        
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise ValueError('Product ID must be an integer')
+        product = products.get(product_id)
+        if not product:
+            raise ValueError(f'Product with ID {product_id} not found')
+        
+        # Get quantity
+        quantity = item_quantity(item_data)
+        
+        # Get unit price (use selling_price if not provided), item discount and GST rate
+        unit_price = item_data.get('unit_price', product.selling_price)
+        item_discount = item_data.get('discount', 0)
+        gst_percentage = item_data.get('gst_percentage', product.gst_percentage)
+        
+        lines.append((product_id, quantity, unit_price, item_discount, gst_percentage or 0))
+    
+    # Calculate line totals, GST splits and bill totals for the whole cart at once
+    _, quantities, unit_prices, discounts, gst_percentages = zip(*lines)
+    try:
+        pricing = price_cart(unit_prices, quantities, discounts, gst_percentages, bill_discount, interstate)
+    except (TypeError, ValueError):
+        raise ValueError('Quantities, prices, discounts and GST rates must be numbers')
+    
+    return lines, pricing
+
+
+# Helper function to build a sale from request data
+def build_sale(data, products):
+    """Build an unsaved Sale and its items from request data.
+
+    ``products`` must already hold every product in the cart, keyed by ID.
+    Returns the sale and the quantity requested per product; raises ValueError
+    with a client-facing message when the data is invalid. The caller assigns
+    the invoice number once the sale is known to be valid.
+    """
+    try:
+        sale_date = datetime.strptime(data.get('sale_date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError('Invalid sale_date format. Use YYYY-MM-DD')
+    
+    # Create new sale
+    new_sale = Sale(
+        customer_id=data.get('customer_id'),
+        sale_date=sale_date,
+        subtotal=0,  # Will be calculated
+        discount=0,  # Will be calculated
+        gst_amount=0,  # Will be calculated
+        total_amount=0,  # Will be calculated
+        is_interstate=bool(data.get('interstate', False)),
+        payment_status=data.get('payment_status', 'paid'),
+        payment_method=data.get('payment_method', 'cash'),
+        notes=data.get('notes')
+    )
+    
+    # Validate and price every line of the cart in one pass
+    lines, pricing = price_items(data['items'], products, data.get('discount', 0), data.get('interstate', False))
+    gst_amounts = to_rupees(pricing.gst).tolist()
+    total_prices = to_rupees(pricing.line_total).tolist()
+    
+    # Create sale items
+    quantities = {}
+    for index, (product_id, quantity, unit_price, item_discount, gst_percentage) in enumerate(lines):
+        new_sale.items.append(SaleItem(
+            product_id=product_id,
+            quantity=quantity,
+            unit_price=unit_price,
+            gst_percentage=gst_percentage,
+            gst_amount=gst_amounts[index],
+            discount=item_discount,
+            total_price=total_prices[index]
+        ))
+        
+        # Track the quantity requested per product (a cart may repeat a product)
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    
+    # Update sale with calculated values
+    new_sale.subtotal = to_rupees(pricing.subtotal)
+    new_sale.discount = to_rupees(pricing.bill_discount)
+    new_sale.gst_amount = to_rupees(pricing.total_gst)
+    new_sale.total_amount = to_rupees(pricing.total)
+    
+    return new_sale, quantities
+
+
+# Helper function to load the products referenced by a cart
+def load_products(product_ids):
+    """Load products by ID with a single query, keyed by ID"""
+    if not product_ids:
+        return {}
+    products = Product.query.filter(Product.id.in_(set(product_ids))).all()
+    return {product.id: product for product in products}
+
+
+# Helper function to read current stock levels
+def current_stock(product_ids):
+    """Return {product_id: (name, stock_quantity)} read with a single query"""
+    rows = db.session.query(Product.id, Product.name, Product.stock_quantity).filter(
+        Product.id.in_(set(product_ids))
+    ).all()
+    return {row.id: (row.name, row.stock_quantity) for row in rows}
+
+
+# Helper function to compare requested quantities with available stock
+def stock_shortfalls(quantities, stock):
+    """List the cart lines whose requested quantity exceeds the available stock"""
+    failed_items = []
+    for product_id, quantity in quantities.items():
+        name, available = stock.get(product_id, (None, 0))
+        if (available or 0) < quantity:
+            failed_items.append({
+                'product_id': product_id,
+                'product_name': name,
+                'requested': quantity,
+                'available': available or 0
+            })
+    return failed_items
+
+
+def insufficient_stock_response(failed_items):
+    """Build the 400 response for lines that could not be fulfilled"""
+    details = '; '.join(
+        f"Insufficient stock for product {item['product_name']}. Available: {item['available']}"
+        for item in failed_items
+    )
+    return jsonify({
+        'error': details,
+        'failed_items': failed_items
+    }), 400
+
+
+# Helper function to decrement stock for a whole cart
+def decrement_stock(quantities):
+    """Decrement stock for {product_id: quantity} with one guarded UPDATE.
+
+    Rows are only updated while they still hold enough stock, so concurrent bills
+    cannot oversell. Returns the IDs that failed; the caller must then roll back.
+    """
+    if not quantities:
+        return []
+    
+    requested = case(quantities, value=Product.id)
+    updated_ids = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(quantities.keys()), Product.stock_quantity >= requested)
+        .values(stock_quantity=Product.stock_quantity - requested)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    
+    return sorted(set(quantities) - set(updated_ids))
+
+
+def sale_movements(sale, quantities):
+    """Build the stock ledger rows for a sale"""
+    return [
+        movement(product_id, -quantity, 'sale', sale.sale_date, sale.id)
+        for product_id, quantity in quantities.items()
+    ]
+
+
+class StockConflict(Exception):
+    """Raised when a guarded stock UPDATE loses a race with another bill"""
+
+
+def sale_batch_result(index, sale):
+    """Build the per-bill result entry for a created sale"""
+    return {
+        'index': index,
+        'status': 'created',
+        'id': sale.id,
+        'invoice_number': sale.invoice_number,
+        'total_amount': sale.total_amount
+    }
+
+
+# Helper function to save one bill of a batch in its own transaction
+def commit_single_sale(index, sale_data, products, invoice_number, stock):
+    """Build, decrement stock for and commit one validated sale, returning its batch result"""
+    for attempt in range(2):
+        new_sale, quantities = build_sale(sale_data, products)
+        new_sale.customer_id = sale_customer_id(sale_data)
+        new_sale.invoice_number = invoice_number
+        
+        failed_items = stock_shortfalls(quantities, stock)
+        if failed_items or decrement_stock(quantities):
+            db.session.rollback()
+            release_generated_invoice_number(invoice_number, sale_data, new_sale.sale_date)
+            return {
+                'index': index,
+                'status': 'failed',
+                'error': 'Insufficient stock',
+                'failed_items': failed_items or stock_shortfalls(quantities, current_stock(quantities.keys()))
+            }
+        
+        db.session.add(new_sale)
+        try:
+            db.session.flush()
+            record_movements(sale_movements(new_sale, quantities))
+            record_sales([new_sale])
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+        
+        # The invoice number is taken; retry a generated one once with a fresh number
+        if sale_data.get('invoice_number') or attempt:
+            return {'index': index, 'status': 'failed', 'error': 'Invoice number already exists'}
+        invoice_number = generate_invoice_number(on_date=new_sale.sale_date)
+    invalidate_reports(SALES, [new_sale.sale_date])
+    
+    for product_id, quantity in quantities.items():
+        name, available = stock[product_id]
+        stock[product_id] = (name, available - quantity)
+    return sale_batch_result(index, new_sale)
 
 
 # Customer routes
+def customer_summary(customer):
+    """Serialize a customer for the customer listing"""
+    return {
+        'id': customer.id,
+        'name': customer.name,
+        'phone': customer.phone,
+        'email': customer.email,
+        'address': customer.address,
+        'gst_number': customer.gst_number,
+        'created_at': customer.created_at.isoformat()
+    }
+
+
 @billing_bp.route('/customers', methods=['GET'])
 @jwt_required()
 def get_customers():
-    """Get all customers"""
-    customers = Customer.query.all()
-    customers_list = []
+    """Get customers, one keyset page at a time"""
+    try:
+        query = filter_by_args(Customer.query, {'gst_number': Customer.gst_number})
+        query, serialize = select_fields(query, CUSTOMER_FIELDS, CUSTOMER_SORT_FIELDS, 'name')
+        customers, next_cursor = paginate(query, Customer.id, CUSTOMER_SORT_FIELDS, 'name')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    for customer in customers:
-        customers_list.append({
-            'id': customer.id,
-            'name': customer.name,
-            'phone': customer.phone,
-            'email': customer.email,
-            'address': customer.address,
-            'gst_number': customer.gst_number,
-            'created_at': customer.created_at.isoformat()
-        })
+    serialize = serialize or customer_summary
+    return paginated_response([serialize(customer) for customer in customers], next_cursor)
+
+
+@billing_bp.route('/customers/lookup', methods=['GET'])
+@jwt_required()
+def lookup_customers():
+    """Find customers by phone number or GSTIN"""
+    phone = request.args.get('phone')
+    gst_number = request.args.get('gst_number')
+    
+    # Both lookups are equality matches on an indexed column
+    if phone:
+        phone_normalized = normalize_phone(phone)
+        if not phone_normalized:
+            return jsonify({'error': 'Phone number must contain digits'}), 400
+        query = Customer.query.filter_by(phone_normalized=phone_normalized)
+    elif gst_number:
+        query = Customer.query.filter_by(gst_number=gst_number.strip().upper())
+    else:
+        return jsonify({'error': 'phone or gst_number is required'}), 400
+    
+    customers = query.order_by(Customer.name).limit(current_app.config['PAGE_SIZE_MAX']).all()
+    return jsonify([customer_summary(customer) for customer in customers]), 200
+
+
+@billing_bp.route('/customers/search', methods=['GET'])
+@jwt_required()
+def search_customers():
+    """Customer name typeahead: customers whose name starts with ?name="""
+    prefix = request.args.get('name', '').strip().lower()
+    if not prefix:
+        return jsonify({'error': 'name is required'}), 400
     
-    return jsonify(customers_list), 200
+    limit = request.args.get('limit', type=int) or 10
+    limit = max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+    
+    # A range on lower(name) can use ix_customers_name_lower on every database; LIKE keeps it exact
+    name = func.lower(Customer.name)
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    customers = Customer.query.filter(
+        name >= prefix,
+        name < upper_bound,
+        name.startswith(prefix, autoescape=True)
+    ).order_by(name, Customer.id).limit(limit).all()
+    
+    return jsonify([{
+        'id': customer.id,
+        'name': customer.name,
+        'phone': customer.phone,
+        'gst_number': customer.gst_number
+    } for customer in customers]), 200
 
 
 @billing_bp.route('/customers/<int:customer_id>', methods=['GET'])
@@ -117,6 +511,9 @@ def update_customer(customer_id):
         customer.gst_number = data['gst_number']
     
     db.session.commit()
+    # A GSTIN moves the customer's sales between B2B and B2C
+    if 'gst_number' in data:
+        invalidate_reports(CUSTOMERS)
     
     return jsonify({
         'message': 'Customer updated successfully',
@@ -131,17 +528,35 @@ def update_customer(customer_id):
 
 
 # Sales routes
+def sale_summary(sale):
+    """Serialize a sale for the sales listing"""
+    return {
+        'id': sale.id,
+        'invoice_number': sale.invoice_number,
+        'customer_id': sale.customer_id,
+        'customer_name': sale.customer.name if sale.customer else 'Walk-in Customer',
+        'sale_date': sale.sale_date.isoformat(),
+        'subtotal': sale.subtotal,
+        'discount': sale.discount,
+        'gst_amount': sale.gst_amount,
+        'total_amount': sale.total_amount,
+        'payment_status': sale.payment_status,
+        'payment_method': sale.payment_method,
+        'created_at': sale.created_at.isoformat()
+    }
+
+
 @billing_bp.route('/sales', methods=['GET'])
 @jwt_required()
 def get_sales():
-    """Get all sales with optional filtering"""
+    """Get sales with optional filtering, one keyset page at a time"""
     # Get query parameters for filtering
     customer_id = request.args.get('customer_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # Start with base query
-    query = Sale.query
+    # Start with base query, loading customers in the same statement
+    query = Sale.query.options(joinedload(Sale.customer))
     
     # Apply filters if provided
     if customer_id:
@@ -159,34 +574,31 @@ def get_sales():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
-    # Execute query
-    sales = query.all()
-    sales_list = []
-    
-    for sale in sales:
-        sales_list.append({
-            'id': sale.id,
-            'invoice_number': sale.invoice_number,
-            'customer_id': sale.customer_id,
-            'customer_name': sale.customer.name if sale.customer else 'Walk-in Customer',
-            'sale_date': sale.sale_date.isoformat(),
-            'subtotal': sale.subtotal,
-            'discount': sale.discount,
-            'gst_amount': sale.gst_amount,
-            'total_amount': sale.total_amount,
-            'payment_status': sale.payment_status,
-            'payment_method': sale.payment_method,
-            'created_at': sale.created_at.isoformat()
+    # Execute query for one page, or stream every matching sale
+    try:
+        query = filter_by_args(query, {
+            'payment_status': Sale.payment_status,
+            'payment_method': Sale.payment_method
         })
+        query, serialize = select_fields(query, SALE_FIELDS, SALE_SORT_FIELDS, '-sale_date', SALE_FIELD_JOINS)
+        serialize = serialize or sale_summary
+        if wants_stream():
+            return stream_response(query, Sale.id, SALE_SORT_FIELDS, '-sale_date', serialize)
+        sales, next_cursor = paginate(query, Sale.id, SALE_SORT_FIELDS, '-sale_date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return jsonify(sales_list), 200
+    return paginated_response([serialize(sale) for sale in sales], next_cursor)
 
 
 @billing_bp.route('/sales/<int:sale_id>', methods=['GET'])
 @jwt_required()
 def get_sale(sale_id):
     """Get a specific sale with its items"""
-    sale = Sale.query.get(sale_id)
+    sale = Sale.query.options(
+        joinedload(Sale.customer),
+        selectinload(Sale.items).joinedload(SaleItem.product)
+    ).get(sale_id)
     
     if not sale:
         return jsonify({'error': 'Sale not found'}), 404
@@ -218,6 +630,7 @@ def get_sale(sale_id):
         'discount': sale.discount,
         'gst_amount': sale.gst_amount,
         'total_amount': sale.total_amount,
+        'interstate': sale.is_interstate,
         'payment_status': sale.payment_status,
         'payment_method': sale.payment_method,
         'notes': sale.notes,
@@ -228,6 +641,7 @@ def get_sale(sale_id):
 
 @billing_bp.route('/sales', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_sale():
     """Create a new sale (bill)"""
     data = request.get_json()
@@ -237,134 +651,281 @@ def create_sale():
         return jsonify({'error': 'Sale items are required'}), 400
     
     # Validate customer if provided
-    customer_id = data.get('customer_id')
+    try:
+        customer_id = sale_customer_id(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     if customer_id and not Customer.query.get(customer_id):
         return jsonify({'error': 'Customer not found'}), 400
     
-    # Generate invoice number
-    invoice_number = data.get('invoice_number') or generate_invoice_number()
+    # Load every product in the cart with a single query and build the sale
+    try:
+        products = load_products(cart_product_ids(data['items']))
+        new_sale, quantities = build_sale(data, products)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    new_sale.customer_id = customer_id
     
-    # Check if invoice number already exists
-    if Sale.query.filter_by(invoice_number=invoice_number).first():
-        return jsonify({'error': 'Invoice number already exists'}), 400
+    # Check the loaded stock first so obviously short carts never take a write lock
+    failed_items = stock_shortfalls(quantities, {
+        product_id: (product.name, product.stock_quantity) for product_id, product in products.items()
+    })
+    if failed_items:
+        return insufficient_stock_response(failed_items)
     
-    # Create new sale
-    new_sale = Sale(
-        invoice_number=invoice_number,
-        customer_id=customer_id,
-        sale_date=datetime.strptime(data.get('sale_date', datetime.now().strftime('%Y-%m-%d')), '%Y-%m-%d').date(),
-        subtotal=0,  # Will be calculated
-        discount=data.get('discount', 0),
-        gst_amount=0,  # Will be calculated
-        total_amount=0,  # Will be calculated
-        payment_status=data.get('payment_status', 'paid'),
-        payment_method=data.get('payment_method', 'cash'),
-        notes=data.get('notes')
-    )
-    
-    # Add sale to database to get ID
-    db.session.add(new_sale)
-    db.session.flush()
-    
-    # Process sale items
-    subtotal = 0
-    total_gst = 0
-    
-    for item_data in data['items']:
-        # Validate product
-        product_id = item_data.get('product_id')
-        if not product_id:
-            db.session.rollback()
-            return jsonify({'error': 'Product ID is required for each item'}), 400
+    for attempt in range(2):
+        # Generate invoice number if none was given. It is taken before the stock UPDATE
+        # locks the database and handed back if the bill fails.
+        invoice_number = data.get('invoice_number') or generate_invoice_number(on_date=new_sale.sale_date)
+        new_sale.invoice_number = invoice_number
         
-        product = Product.query.get(product_id)
-        if not product:
+        # Decrement stock with one guarded UPDATE; this is the authoritative check
+        failed_ids = decrement_stock(quantities)
+        if failed_ids:
             db.session.rollback()
-            return jsonify({'error': f'Product with ID {product_id} not found'}), 400
+            release_generated_invoice_number(invoice_number, data, new_sale.sale_date)
+            return insufficient_stock_response(stock_shortfalls(
+                {product_id: quantities[product_id] for product_id in failed_ids},
+                current_stock(failed_ids)
+            ))
         
-        # Get quantity
-        quantity = item_data.get('quantity', 1)
-        if quantity <= 0:
-            db.session.rollback()
-            return jsonify({'error': 'Quantity must be greater than zero'}), 400
-        
-        # Check if enough stock is available
-        if product.stock_quantity < quantity:
+        # Save sale and its items, then commit transaction together with the idempotent response and the day's totals
+        try:
+            db.session.add(new_sale)
+            db.session.flush()
+            record_movements(sale_movements(new_sale, quantities))
+            
+            response = {
+                'message': 'Sale created successfully',
+                'sale': {
+                    'id': new_sale.id,
+                    'invoice_number': new_sale.invoice_number,
+                    'total_amount': new_sale.total_amount
+                }
+            }
+            remember_response(response, 201)
+            record_sales([new_sale])
+            db.session.commit()
+            break
+        except IntegrityError:
             db.session.rollback()
-            return jsonify({
-                'error': f'Insufficient stock for product {product.name}. Available: {product.stock_quantity}'
-            }), 400
         
-        # Get unit price (use selling_price if not provided)
-        unit_price = item_data.get('unit_price', product.selling_price)
-        
-        # Calculate item discount
-        item_discount = item_data.get('discount', 0)
+        # A concurrent retry with the same Idempotency-Key won
+        replayed = replay_stored_response()
+        if replayed:
+            release_generated_invoice_number(invoice_number, data, new_sale.sale_date)
+            return replayed
         
-        # Calculate GST
-        gst_percentage = item_data.get('gst_percentage', product.gst_percentage)
-        price_after_discount = (unit_price - item_discount) * quantity
-        gst_amount = (price_after_discount * gst_percentage) / 100
+        # The invoice number is taken. A generated one can still collide (e.g. with a number
+        # allocated before a restore), so retry once with a fresh one; it is not handed back.
+        if data.get('invoice_number') or attempt:
+            return jsonify({'error': 'Invoice number already exists'}), 400
+        new_sale, quantities = build_sale(data, products)
+        new_sale.customer_id = customer_id
+    invalidate_reports(SALES, [new_sale.sale_date])
+    
+    return jsonify(response), 201
+
+
+@billing_bp.route('/sales/batch', methods=['POST'])
+@jwt_required()
+@idempotent
+def create_sales_batch():
+    """Create many sales at once (offline POS sync)"""
+    data = request.get_json()
+    
+    # Accept either a bare array or {"sales": [...]}
+    sales_data = data if isinstance(data, list) else (data or {}).get('sales')
+    if not sales_data or not isinstance(sales_data, list):
+        return jsonify({'error': 'A list of sales is required'}), 400
+    
+    max_size = current_app.config['SALES_BATCH_MAX_SIZE']
+    if len(sales_data) > max_size:
+        return jsonify({'error': f'A batch can contain at most {max_size} sales'}), 400
+    
+    chunk_size = request.args.get('chunk_size', type=int) or current_app.config['SALES_BATCH_CHUNK_SIZE']
+    if chunk_size <= 0:
+        return jsonify({'error': 'chunk_size must be greater than zero'}), 400
+    
+    # Preload one snapshot of every product, customer and invoice number the batch refers to
+    product_ids = set()
+    customer_ids = set()
+    invoice_numbers = set()
+    for sale_data in sales_data:
+        if not isinstance(sale_data, dict):
+            continue
+        try:
+            product_ids.update(cart_product_ids(sale_data.get('items') or []))
+        except ValueError:
+            pass  # Reported per bill below
+        try:
+            customer_ids.add(sale_customer_id(sale_data))
+        except ValueError:
+            pass  # Reported per bill below
+        if sale_data.get('invoice_number'):
+            invoice_numbers.add(sale_data['invoice_number'])
+    
+    products = load_products(product_ids)
+    customer_ids.discard(None)
+    known_customers = set()
+    if customer_ids:
+        known_customers = {row.id for row in db.session.query(Customer.id).filter(Customer.id.in_(customer_ids))}
+    used_invoice_numbers = set()
+    if invoice_numbers:
+        used_invoice_numbers = {
+            row.invoice_number for row in
+            db.session.query(Sale.invoice_number).filter(Sale.invoice_number.in_(invoice_numbers))
+        }
+    
+    # Running stock snapshot, reduced as bills in the batch are accepted
+    stock = {product_id: (product.name, product.stock_quantity) for product_id, product in products.items()}
+    
+    results = [None] * len(sales_data)
+    for chunk_start in range(0, len(sales_data), chunk_size):
+        pending = []
         
-        # Calculate total price
-        total_price = price_after_discount + gst_amount
+        # Validate every bill in the chunk against the snapshot
+        for index in range(chunk_start, min(chunk_start + chunk_size, len(sales_data))):
+            sale_data = sales_data[index]
+            try:
+                if not isinstance(sale_data, dict) or not sale_data.get('items'):
+                    raise ValueError('Sale items are required')
+                
+                customer_id = sale_customer_id(sale_data)
+                if customer_id and customer_id not in known_customers:
+                    raise ValueError('Customer not found')
+                
+                invoice_number = sale_data.get('invoice_number')
+                if invoice_number in used_invoice_numbers:
+                    raise ValueError('Invoice number already exists')
+                
+                new_sale, quantities = build_sale(sale_data, products)
+                new_sale.customer_id = customer_id
+            except ValueError as e:
+                results[index] = {'index': index, 'status': 'failed', 'error': str(e)}
+                continue
+            
+            failed_items = stock_shortfalls(quantities, stock)
+            if failed_items:
+                results[index] = {
+                    'index': index,
+                    'status': 'failed',
+                    'error': 'Insufficient stock',
+                    'failed_items': failed_items
+                }
+                continue
+            
+            for product_id, quantity in quantities.items():
+                name, available = stock[product_id]
+                stock[product_id] = (name, available - quantity)
+            new_sale.invoice_number = invoice_number or generate_invoice_number(on_date=new_sale.sale_date)
+            used_invoice_numbers.add(new_sale.invoice_number)
+            pending.append((index, new_sale, quantities))
         
-        # Create sale item
-        sale_item = SaleItem(
-            sale_id=new_sale.id,
-            product_id=product_id,
-            quantity=quantity,
-            unit_price=unit_price,
-            gst_percentage=gst_percentage,
-            gst_amount=gst_amount,
-            discount=item_discount,
-            total_price=total_price
-        )
+        if not pending:
+            continue
         
-        # Add sale item to database
-        db.session.add(sale_item)
+        # Decrement stock for the whole chunk with one guarded UPDATE and insert its bills together
+        chunk_quantities = {}
+        for _, _, quantities in pending:
+            for product_id, quantity in quantities.items():
+                chunk_quantities[product_id] = chunk_quantities.get(product_id, 0) + quantity
         
-        # Update product stock
-        product.stock_quantity -= quantity
+        try:
+            if decrement_stock(chunk_quantities):
+                raise StockConflict()
+            db.session.add_all([new_sale for _, new_sale, _ in pending])
+            db.session.flush()
+            record_movements([
+                row for _, new_sale, quantities in pending for row in sale_movements(new_sale, quantities)
+            ])
+            record_sales([new_sale for _, new_sale, _ in pending])
+            db.session.commit()
+        except (StockConflict, IntegrityError):
+            # Another counter billed concurrently; retry this chunk one bill at a time
+            db.session.rollback()
+            stock.update(current_stock(chunk_quantities.keys()))
+            for index, pending_sale, _ in pending:
+                results[index] = commit_single_sale(index, sales_data[index], products, pending_sale.invoice_number, stock)
+            continue
         
-        # Update totals
-        subtotal += price_after_discount
-        total_gst += gst_amount
-    
-    # Calculate total amount
-    total_discount = data.get('discount', 0)
-    total_amount = subtotal + total_gst - total_discount
+        invalidate_reports(SALES, [new_sale.sale_date for _, new_sale, _ in pending])
+        for index, new_sale, _ in pending:
+            results[index] = sale_batch_result(index, new_sale)
     
-    # Update sale with calculated values
-    new_sale.subtotal = subtotal
-    new_sale.gst_amount = total_gst
-    new_sale.total_amount = total_amount
+    created = sum(1 for result in results if result['status'] == 'created')
+    response = {
+        'message': f'{created} of {len(results)} sales created',
+        'created': created,
+        'failed': len(results) - created,
+        'results': results
+    }
     
-    # Commit transaction
+    # Store the outcome for a retried Idempotency-Key; the bills themselves were committed per chunk
+    remember_response(response, 200)
     db.session.commit()
     
-    return jsonify({
-        'message': 'Sale created successfully',
-        'sale': {
-            'id': new_sale.id,
-            'invoice_number': new_sale.invoice_number,
-            'total_amount': new_sale.total_amount
-        }
-    }), 201
+    return jsonify(response), 200
+
+
+@billing_bp.route('/sales/quote', methods=['POST'])
+@jwt_required()
+def quote_sale():
+    """Price a cart without creating a sale"""
+    data = request.get_json()
+    
+    # Check if required fields are present
+    if not data or 'items' not in data or not data['items']:
+        return jsonify({'error': 'Sale items are required'}), 400
+    
+    # Price the cart from the in-process catalog cache; nothing is written
+    try:
+        products = catalog_entries(cart_product_ids(data['items']))
+        lines, pricing = price_items(data['items'], products, data.get('discount', 0), data.get('interstate', False))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    taxable_amounts = to_rupees(pricing.taxable).tolist()
+    cgst_amounts = to_rupees(pricing.cgst).tolist()
+    sgst_amounts = to_rupees(pricing.sgst).tolist()
+    igst_amounts = to_rupees(pricing.igst).tolist()
+    gst_amounts = to_rupees(pricing.gst).tolist()
+    total_prices = to_rupees(pricing.line_total).tolist()
+    
+    items = []
+    for index, (product_id, quantity, unit_price, item_discount, gst_percentage) in enumerate(lines):
+        items.append({
+            'product_id': product_id,
+            'product_name': products[product_id].name,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'discount': item_discount,
+            'gst_percentage': gst_percentage,
+            'taxable_amount': taxable_amounts[index],
+            'cgst_amount': cgst_amounts[index],
+            'sgst_amount': sgst_amounts[index],
+            'igst_amount': igst_amounts[index],
+            'gst_amount': gst_amounts[index],
+            'total_price': total_prices[index]
+        })
+    
+    quote = pricing.summary()
+    quote['items'] = items
+    return jsonify(quote), 200
 
 
 # Purchase routes
 @billing_bp.route('/purchases', methods=['GET'])
 @jwt_required()
 def get_purchases():
-    """Get all purchases with optional filtering"""
+    """Get purchases with optional filtering, one keyset page at a time"""
     # Get query parameters for filtering
     vendor_id = request.args.get('vendor_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    # Start with base query
-    query = Purchase.query
+    # Start with base query, loading vendors in the same statement
+    query = Purchase.query.options(joinedload(Purchase.vendor))
     
     # Apply filters if provided
     if vendor_id:
@@ -382,8 +943,15 @@ def get_purchases():
         except ValueError:
             return jsonify({'error': 'Invalid end_date format. Use YYYY-MM-DD'}), 400
     
-    # Execute query
-    purchases = query.all()
+    # Execute query for one page
+    try:
+        query = filter_by_args(query, {
+            'payment_status': Purchase.payment_status,
+            'payment_method': Purchase.payment_method
+        })
+        purchases, next_cursor = paginate(query, Purchase.id, PURCHASE_SORT_FIELDS, '-purchase_date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     purchases_list = []
     
     for purchase in purchases:
@@ -399,14 +967,17 @@ def get_purchases():
             'created_at': purchase.created_at.isoformat()
         })
     
-    return jsonify(purchases_list), 200
+    return paginated_response(purchases_list, next_cursor)
 
 
 @billing_bp.route('/purchases/<int:purchase_id>', methods=['GET'])
 @jwt_required()
 def get_purchase(purchase_id):
     """Get a specific purchase with its items"""
-    purchase = Purchase.query.get(purchase_id)
+    purchase = Purchase.query.options(
+        joinedload(Purchase.vendor),
+        selectinload(Purchase.items).joinedload(PurchaseItem.product)
+    ).get(purchase_id)
     
     if not purchase:
         return jsonify({'error': 'Purchase not found'}), 404
@@ -420,6 +991,7 @@ def get_purchase(purchase_id):
             'product_name': item.product.name,
             'quantity': item.quantity,
             'unit_price': item.unit_price,
+            'gst_percentage': item.gst_percentage,
             'gst_amount': item.gst_amount,
             'total_price': item.total_price
         })
@@ -442,6 +1014,7 @@ def get_purchase(purchase_id):
 
 @billing_bp.route('/purchases', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_purchase():
     """Create a new purchase"""
     data = request.get_json()
@@ -473,6 +1046,7 @@ def create_purchase():
     
     # Process purchase items
     total_amount = 0
+    movements = []
     
     for item_data in data['items']:
         # Validate product
@@ -506,8 +1080,17 @@ def create_purchase():
         quantity = item_data.get('quantity', 1)
         unit_price = item_data.get('unit_price', product.purchase_price)
         
-        # Calculate GST amount
-        gst_amount = item_data.get('gst_amount', 0)
+        # Keep the rate and GST the vendor billed; when only one of them was sent, derive the other
+        gst_amount = item_data.get('gst_amount')
+        gst_percentage = item_data.get('gst_percentage')
+        if gst_amount is None:
+            try:
+                gst_amount = gst_on(unit_price * quantity, float(gst_percentage)) if gst_percentage else 0
+            except (TypeError, ValueError):
+                db.session.rollback()
+                return jsonify({'error': 'GST percentage must be a number'}), 400
+        if gst_percentage is None:
+            gst_percentage = float(infer_gst_rates([unit_price * quantity], [gst_amount])[0])
         
         # Calculate total price
         total_price = (unit_price * quantity) + gst_amount
@@ -518,6 +1101,7 @@ def create_purchase():
             product_id=product_id,
             quantity=quantity,
             unit_price=unit_price,
+            gst_percentage=gst_percentage,
             gst_amount=gst_amount,
             total_price=total_price
         )
@@ -528,21 +1112,33 @@ def create_purchase():
         # Update product stock and purchase price
         product.stock_quantity += quantity
         product.purchase_price = unit_price  # Update with latest purchase price
+        movements.append(movement(product_id, quantity, 'purchase', new_purchase.purchase_date, new_purchase.id))
         
         # Update total amount
         total_amount += total_price
     
-    # Update purchase with calculated total
+    # Update purchase with calculated total and record the stock movements
     new_purchase.total_amount = total_amount
+    record_movements(movements)
     
-    # Commit transaction
-    db.session.commit()
-    
-    return jsonify({
+    response = {
         'message': 'Purchase created successfully',
         'purchase': {
             'id': new_purchase.id,
             'invoice_number': new_purchase.invoice_number,
             'total_amount': new_purchase.total_amount
         }
-    }), 201
\ No newline at end of file
+    }
+    
+    # Commit transaction together with the idempotent response and the day's totals
+    remember_response(response, 201)
+    record_purchases([new_purchase])
+    db.session.commit()
+    
+    # Purchases can add products and change prices
+    changed_ids = {row['product_id'] for row in movements}
+    invalidate_catalog(changed_ids)
+    refresh_matcher(changed_ids)
+    invalidate_reports(PURCHASES, [new_purchase.purchase_date])
+    
+    return jsonify(response), 201
\ No newline at end of file
@@ -1,9 +1,50 @@
-from flask import Blueprint, request, jsonify
+from flask import current_app, request, jsonify
 from flask_jwt_extended import jwt_required
-from app.models import Product, Category, Vendor
+from app.models import Product, Category, Vendor, StockMovement, StockCheckpoint
 from app import db
+from sqlalchemy.orm import joinedload
+from app.api.inventory import inventory_bp
+from app.services.catalog import catalog_entries_by_code, catalog_stats, invalidate_catalog
+from app.services.report_cache import PRODUCTS, invalidate_reports
+from app.services.stock_ledger import movement, record_movements, stock_as_of
+from app.services.product_search import search_products
+from app.services.product_matcher import DEFAULT_CANDIDATES, match_text, refresh_matcher
+from app.api.pagination import filter_by_args, paginate, paginated_response, select_fields, stream_response, wants_stream
+from datetime import date, datetime
 
-inventory_bp = Blueprint('inventory', __name__)
+# Fields the product listing can be sorted by
+PRODUCT_SORT_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'selling_price': Product.selling_price,
+    'stock_quantity': Product.stock_quantity,
+    'created_at': Product.created_at
+}
+
+# Fields the product listing can be narrowed to with ?fields=
+PRODUCT_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'description': Product.description,
+    'sku': Product.sku,
+    'barcode': Product.barcode,
+    'purchase_price': Product.purchase_price,
+    'selling_price': Product.selling_price,
+    'wholesale_price': Product.wholesale_price,
+    'stock_quantity': Product.stock_quantity,
+    'low_stock_threshold': Product.low_stock_threshold,
+    'gst_percentage': Product.gst_percentage,
+    'hsn_code': Product.hsn_code,
+    'category_id': Product.category_id,
+    'category_name': Category.name,
+    'vendor_id': Product.vendor_id,
+    'vendor_name': Vendor.name,
+    'created_at': Product.created_at
+}
+PRODUCT_FIELD_JOINS = {
+    'category_name': (Category, Product.category_id == Category.id),
+    'vendor_name': (Vendor, Product.vendor_id == Vendor.id)
+}
 
 # Category routes
 @inventory_bp.route('/categories', methods=['GET'])
@@ -79,6 +120,8 @@ def update_category(category_id):
         category.description = data['description']
     
     db.session.commit()
+    # The inventory report shows category names
+    invalidate_reports(PRODUCTS)
     
     return jsonify({
         'message': 'Category updated successfully',
@@ -112,17 +155,52 @@ def delete_category(category_id):
 
 
 # Product routes
+def product_summary(product):
+    """Serialize a product for the product listing"""
+    return {
+        'id': product.id,
+        'name': product.name,
+        'description': product.description,
+        'sku': product.sku,
+        'barcode': product.barcode,
+        'purchase_price': product.purchase_price,
+        'selling_price': product.selling_price,
+        'wholesale_price': product.wholesale_price,
+        'stock_quantity': product.stock_quantity,
+        'low_stock_threshold': product.low_stock_threshold,
+        'gst_percentage': product.gst_percentage,
+        'hsn_code': product.hsn_code,
+        'category_id': product.category_id,
+        'category_name': product.category.name if product.category else None,
+        'vendor_id': product.vendor_id,
+        'vendor_name': product.vendor.name if product.vendor else None,
+        'created_at': product.created_at.isoformat()
+    }
+
+
+def stock_quantity_value(value):
+    """Return a stock quantity sent by the client as a non-negative integer"""
+    # The ledger records the difference, so the count must be a number, not e.g. "7"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('Stock quantity must be a whole number of zero or more')
+    return value
+
+
 @inventory_bp.route('/products', methods=['GET'])
 @jwt_required()
 def get_products():
-    """Get all products with optional filtering"""
+    """Get products with optional filtering, one keyset page at a time"""
     # Get query parameters for filtering
     category_id = request.args.get('category_id', type=int)
     vendor_id = request.args.get('vendor_id', type=int)
     low_stock = request.args.get('low_stock', type=bool, default=False)
     
-    # Start with base query
-    query = Product.query
+    # Start with base query, loading categories and vendors in the same statement
+    query = Product.query.options(joinedload(Product.category), joinedload(Product.vendor))
     
     # Apply filters if provided
     if category_id:
@@ -132,32 +210,18 @@ def get_products():
     if low_stock:
         query = query.filter(Product.stock_quantity <= Product.low_stock_threshold)
     
-    # Execute query
-    products = query.all()
-    products_list = []
-    
-    for product in products:
-        products_list.append({
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'sku': product.sku,
-            'barcode': product.barcode,
-            'purchase_price': product.purchase_price,
-            'selling_price': product.selling_price,
-            'wholesale_price': product.wholesale_price,
-            'stock_quantity': product.stock_quantity,
-            'low_stock_threshold': product.low_stock_threshold,
-            'gst_percentage': product.gst_percentage,
-            'hsn_code': product.hsn_code,
-            'category_id': product.category_id,
-            'category_name': product.category.name if product.category else None,
-            'vendor_id': product.vendor_id,
-            'vendor_name': product.vendor.name if product.vendor else None,
-            'created_at': product.created_at.isoformat()
-        })
-    
-    return jsonify(products_list), 200
+    # Execute query for one page, or stream every matching product
+    try:
+        query = filter_by_args(query, {'hsn_code': Product.hsn_code, 'gst_percentage': Product.gst_percentage})
+        query, serialize = select_fields(query, PRODUCT_FIELDS, PRODUCT_SORT_FIELDS, 'name', PRODUCT_FIELD_JOINS)
+        serialize = serialize or product_summary
+        if wants_stream():
+            return stream_response(query, Product.id, PRODUCT_SORT_FIELDS, 'name', serialize)
+        products, next_cursor = paginate(query, Product.id, PRODUCT_SORT_FIELDS, 'name')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return paginated_response([serialize(product) for product in products], next_cursor)
 
 
 @inventory_bp.route('/products/<int:product_id>', methods=['GET'])
@@ -190,6 +254,82 @@ def get_product(product_id):
     }), 200
 
 
+@inventory_bp.route('/products/search', methods=['GET'])
+@jwt_required()
+def search_product_names():
+    """Search products by name, description, SKU or barcode, best matches first"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'error': 'Search query q is required'}), 400
+    
+    limit = request.args.get('limit', type=int) or current_app.config['PRODUCT_SEARCH_LIMIT']
+    limit = max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+    
+    products = search_products(q, limit)
+    
+    return jsonify([{
+        'id': product.id,
+        'name': product.name,
+        'sku': product.sku,
+        'barcode': product.barcode,
+        'selling_price': product.selling_price,
+        'gst_percentage': product.gst_percentage,
+        'stock_quantity': product.stock_quantity
+    } for product in products]), 200
+
+
+@inventory_bp.route('/products/match', methods=['POST'])
+@jwt_required()
+def match_product_text():
+    """Resolve free text from voice or OCR entry to ranked product candidates"""
+    data = request.get_json()
+    
+    # Check if required fields are present
+    if not data or not isinstance(data.get('text'), str) or not data['text'].strip():
+        return jsonify({'error': 'Text is required'}), 400
+    
+    limit = request.args.get('limit', type=int) or DEFAULT_CANDIDATES
+    limit = max(1, min(limit, current_app.config['PRODUCT_SEARCH_LIMIT']))
+    
+    # One entry per item in the text, e.g. "two maggi noodles, surf exel 1kg"
+    return jsonify(match_text(data['text'], limit)), 200
+
+
+@inventory_bp.route('/products/by-code/<code>', methods=['GET'])
+@jwt_required()
+def get_product_by_code(code):
+    """Look up a product by barcode or SKU (for barcode scanners)"""
+    entry = catalog_entries_by_code([code]).get(code)
+    
+    if not entry:
+        return jsonify({'error': 'Product not found'}), 404
+    
+    return jsonify(entry._asdict()), 200
+
+
+@inventory_bp.route('/products/by-code', methods=['POST'])
+@jwt_required()
+def get_products_by_code():
+    """Look up many products by barcode or SKU at once"""
+    data = request.get_json()
+    
+    # Check if required fields are present
+    if not data or not isinstance(data.get('codes'), list) or not data['codes']:
+        return jsonify({'error': 'A list of codes is required'}), 400
+    
+    codes = [str(code) for code in data['codes']]
+    max_codes = current_app.config['CATALOG_LOOKUP_MAX_CODES']
+    if len(codes) > max_codes:
+        return jsonify({'error': f'At most {max_codes} codes can be looked up at once'}), 400
+    
+    found = catalog_entries_by_code(codes)
+    
+    return jsonify({
+        'products': [dict(found[code]._asdict(), code=code) for code in codes if code in found],
+        'missing': [code for code in codes if code not in found]
+    }), 200
+
+
 @inventory_bp.route('/products', methods=['POST'])
 @jwt_required()
 def create_product():
@@ -202,6 +342,12 @@ def create_product():
         if field not in data:
             return jsonify({'error': f'Missing required field: {field}'}), 400
     
+    # Check the opening stock
+    try:
+        stock_quantity = stock_quantity_value(data.get('stock_quantity', 0))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Check if category exists if provided
     category_id = data.get('category_id')
     if category_id and not Category.query.get(category_id):
@@ -221,7 +367,7 @@ def create_product():
         purchase_price=data['purchase_price'],
         selling_price=data['selling_price'],
         wholesale_price=data.get('wholesale_price'),
-        stock_quantity=data.get('stock_quantity', 0),
+        stock_quantity=stock_quantity,
         low_stock_threshold=data.get('low_stock_threshold', 10),
         gst_percentage=data.get('gst_percentage', 0),
         hsn_code=data.get('hsn_code'),
@@ -229,9 +375,14 @@ def create_product():
         vendor_id=vendor_id
     )
     
-    # Save to database
+    # Save to database, recording any initial stock in the ledger
     db.session.add(new_product)
+    db.session.flush()
+    record_movements([movement(new_product.id, new_product.stock_quantity, 'opening', date.today())])
     db.session.commit()
+    invalidate_catalog([new_product.id])
+    refresh_matcher([new_product.id])
+    invalidate_reports(PRODUCTS)
     
     return jsonify({
         'message': 'Product created successfully',
@@ -256,6 +407,13 @@ def update_product(product_id):
     
     data = request.get_json()
     
+    # Check the new stock count if provided
+    if 'stock_quantity' in data:
+        try:
+            stock_quantity = stock_quantity_value(data['stock_quantity'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
     # Check if category exists if provided
     category_id = data.get('category_id')
     if category_id and not Category.query.get(category_id):
@@ -282,7 +440,11 @@ def update_product(product_id):
     if 'wholesale_price' in data:
         product.wholesale_price = data['wholesale_price']
     if 'stock_quantity' in data:
-        product.stock_quantity = data['stock_quantity']
+        # Record manual stock corrections in the ledger
+        record_movements([movement(
+            product.id, stock_quantity - (product.stock_quantity or 0), 'adjustment', date.today()
+        )])
+        product.stock_quantity = stock_quantity
     if 'low_stock_threshold' in data:
         product.low_stock_threshold = data['low_stock_threshold']
     if 'gst_percentage' in data:
@@ -295,6 +457,9 @@ def update_product(product_id):
         product.vendor_id = vendor_id
     
     db.session.commit()
+    invalidate_catalog([product_id])
+    refresh_matcher([product_id])
+    invalidate_reports(PRODUCTS)
     
     return jsonify({
         'message': 'Product updated successfully',
@@ -323,8 +488,14 @@ def delete_product(product_id):
             'error': 'Cannot delete product with associated purchase or sale records'
         }), 400
     
+    # Products without sales or purchases only have opening or adjustment history
+    StockMovement.query.filter_by(product_id=product_id).delete(synchronize_session=False)
+    StockCheckpoint.query.filter_by(product_id=product_id).delete(synchronize_session=False)
     db.session.delete(product)
     db.session.commit()
+    invalidate_catalog([product_id])
+    refresh_matcher([product_id])
+    invalidate_reports(PRODUCTS)
     
     return jsonify({'message': 'Product deleted successfully'}), 200
 
@@ -333,7 +504,9 @@ def delete_product(product_id):
 @jwt_required()
 def get_low_stock_products():
     """Get products with stock below threshold"""
-    products = Product.query.filter(Product.stock_quantity <= Product.low_stock_threshold).all()
+    products = Product.query.options(joinedload(Product.category), joinedload(Product.vendor)).filter(
+        Product.stock_quantity <= Product.low_stock_threshold
+    ).all()
     products_list = []
     
     for product in products:
@@ -346,4 +519,65 @@ def get_low_stock_products():
             'vendor_name': product.vendor.name if product.vendor else None
         })
     
-    return jsonify(products_list), 200
\ No newline at end of file
+    return jsonify(products_list), 200
+
+
+@inventory_bp.route('/products/<int:product_id>/stock', methods=['GET'])
+@jwt_required()
+def get_product_stock(product_id):
+    """Get a product's stock, optionally as of the end of a past date"""
+    product = Product.query.get(product_id)
+    
+    if not product:
+        return jsonify({'error': 'Product not found'}), 404
+    
+    as_of = request.args.get('as_of')
+    if not as_of:
+        return jsonify({
+            'product_id': product.id,
+            'name': product.name,
+            'as_of': None,
+            'stock_quantity': product.stock_quantity
+        }), 200
+    
+    try:
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid as_of format. Use YYYY-MM-DD'}), 400
+    
+    return jsonify({
+        'product_id': product.id,
+        'name': product.name,
+        'as_of': as_of.isoformat(),
+        'stock_quantity': stock_as_of(as_of, [product.id])[product.id]
+    }), 200
+
+
+@inventory_bp.route('/stock', methods=['GET'])
+@jwt_required()
+def get_stock_as_of():
+    """Get every product's stock as of the end of a date"""
+    as_of = request.args.get('as_of')
+    if not as_of:
+        return jsonify({'error': 'as_of is required (YYYY-MM-DD)'}), 400
+    
+    try:
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid as_of format. Use YYYY-MM-DD'}), 400
+    
+    stock = stock_as_of(as_of)
+    products = db.session.query(Product.id, Product.name).all()
+    
+    return jsonify([{
+        'product_id': product.id,
+        'name': product.name,
+        'stock_quantity': stock.get(product.id, 0)
+    } for product in products]), 200
+
+
+@inventory_bp.route('/catalog/stats', methods=['GET'])
+@jwt_required()
+def get_catalog_stats():
+    """Get the product catalog cache size and hit/miss counters"""
+    return jsonify(catalog_stats()), 200
@@ -2,6 +2,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from app.models import OCRScan
 from app import db
+from app.api.pagination import filter_by_args, paginate, paginated_response
+from app.services.product_matcher import match_text
 import os
 import json
 import uuid
@@ -13,6 +15,9 @@ from google.cloud import translate_v2 as translate
 
 ocr_bp = Blueprint('ocr', __name__)
 
+# Fields the scan listing can be sorted by
+SCAN_SORT_FIELDS = {'id': OCRScan.id, 'scan_date': OCRScan.scan_date}
+
 # Configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'uploads')
 if not os.path.exists(UPLOAD_FOLDER):
@@ -206,14 +211,22 @@ def scan_image():
     # Add scan ID to result
     result['scan_id'] = ocr_scan.id
     
+    # Match the text against the product catalog if requested
+    if request.form.get('match_products', 'false').lower() == 'true':
+        result['products'] = match_text(result.get('translated_text') or result.get('raw_text', ''))
+    
     return jsonify(result), 200
 
 
 @ocr_bp.route('/scans', methods=['GET'])
 @jwt_required()
 def get_scans():
-    """Get all OCR scans"""
-    scans = OCRScan.query.order_by(OCRScan.scan_date.desc()).all()
+    """Get OCR scans, newest first, one keyset page at a time"""
+    try:
+        query = filter_by_args(OCRScan.query, {'scan_type': OCRScan.scan_type, 'processed': OCRScan.processed})
+        scans, next_cursor = paginate(query, OCRScan.id, SCAN_SORT_FIELDS, '-scan_date')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     scans_list = []
     
     for scan in scans:
@@ -227,7 +240,7 @@ def get_scans():
             'translated': scan.translated
         })
     
-    return jsonify(scans_list), 200
+    return paginated_response(scans_list, next_cursor)
 
 
 @ocr_bp.route('/scans/<int:scan_id>', methods=['GET'])
@@ -0,0 +1,214 @@
+from flask import current_app, request, jsonify, stream_with_context
+from sqlalchemy import and_, or_
+from datetime import date, datetime
+from urllib.parse import urlencode
+import base64
+import json
+
+# Keyset pagination shared by the list endpoints.
+#
+# Clients pass ?limit=, ?sort= (a field name, prefixed with '-' for descending)
+# and the ?cursor= returned in the X-Next-Cursor header of the previous page.
+# Each page is read with WHERE (sort_key, id) > (last_sort_key, last_id) instead
+# of OFFSET, so its cost depends on the page size and not on the table size.
+# The response body stays a plain JSON array, and a request with neither
+# ?limit= nor ?cursor= still gets the whole list, as before paging existed.
+#
+# NULLs in a nullable sort column sort after every value (first when
+# descending) on every database, and cursors positioned on a NULL continue
+# through the remaining NULLs by id.
+#
+# ?fields=id,name,... narrows the listing to the named fields. The query is then
+# turned into a column-only SELECT, so other columns and related rows are never
+# loaded or serialized (see select_fields).
+#
+# With ?stream=1 an endpoint instead sends every matching row, in the same sort
+# order, as a JSON array streamed from a server-side cursor (see stream_response).
+
+
+def _encode_cursor(sort, value, last_id):
+    """Encode the position after the last row of a page"""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    payload = json.dumps({'sort': sort, 'value': value, 'id': last_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, sort, column):
+    """Decode a cursor into (value, last_id) for the given sort"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, last_id = payload['value'], int(payload['id'])
+        if payload['sort'] != sort:
+            raise ValueError
+        python_type = column.type.python_type
+        if value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and python_type is date:
+            value = date.fromisoformat(value)
+    except (ValueError, TypeError, KeyError, NotImplementedError):
+        raise ValueError('Invalid cursor for this sort order')
+    return value, last_id
+
+
+def filter_by_args(query, filters):
+    """Apply equality filters for the request args named in {arg: column}"""
+    for arg, column in filters.items():
+        value = request.args.get(arg)
+        if value is not None and value != '':
+            python_type = column.type.python_type
+            if python_type is bool:
+                value = value.lower() in ('1', 'true', 'yes')
+            elif python_type is int:
+                try:
+                    value = int(value)
+                except ValueError:
+                    raise ValueError(f'{arg} must be an integer')
+            query = query.filter(column == value)
+    return query
+
+
+def _resolve_sort(sort_fields, default_sort):
+    """Return (sort, column, descending) for the requested ?sort="""
+    sort = request.args.get('sort', default_sort)
+    descending = sort.startswith('-')
+    column = sort_fields.get(sort.lstrip('-'))
+    if column is None:
+        raise ValueError(f"Invalid sort. Use one of: {', '.join(sorted(sort_fields))}")
+    return sort, column, descending
+
+
+def _nullable(column):
+    """Whether a sort column can hold NULLs"""
+    return getattr(column, 'nullable', True)
+
+
+def _order(query, column, id_column, descending):
+    """Order by the sort column, then id, in the same direction, with NULLs treated as the largest value"""
+    if descending:
+        order = column.desc().nulls_first() if _nullable(column) else column.desc()
+        return query.order_by(order, id_column.desc())
+    order = column.asc().nulls_last() if _nullable(column) else column.asc()
+    return query.order_by(order, id_column.asc())
+
+
+def _after(column, id_column, value, last_id, descending):
+    """Return the condition for rows after (value, last_id) in the order _order() uses"""
+    if column is id_column:
+        return id_column < last_id if descending else id_column > last_id
+    if value is None:
+        # NULLs come last ascending and first descending; finish them by id
+        if descending:
+            return or_(column.is_not(None), and_(column.is_(None), id_column < last_id))
+        return and_(column.is_(None), id_column > last_id)
+    if descending:
+        return or_(column < value, and_(column == value, id_column < last_id))
+    after = or_(column > value, and_(column == value, id_column > last_id))
+    return or_(after, column.is_(None)) if _nullable(column) else after
+
+
+def wants_stream():
+    """Whether the client asked for the whole collection as a stream"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def select_fields(query, columns, sort_fields, default_sort, joins=None):
+    """Project `query` onto the fields named in ?fields=.
+
+    ``columns`` maps every field a listing offers to a column expression, and must
+    include 'id'; ``joins`` maps fields that live on another table to the
+    (target, onclause) outer join they need. Returns (query, serialize), or
+    (query, None) when no fields were requested. The id and the sort column are
+    always selected so the result can still be paged. Raises ValueError for
+    unknown fields.
+    """
+    requested = request.args.get('fields')
+    if not requested:
+        return query, None
+
+    fields = list(dict.fromkeys(field.strip() for field in requested.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ValueError(f"Invalid fields: {', '.join(unknown)}. Use any of: {', '.join(columns)}")
+
+    _, sort_column, _ = _resolve_sort(sort_fields, default_sort)
+    selected = dict.fromkeys(fields + ['id'])
+    selected.update({field: None for field, column in columns.items() if column is sort_column})
+    query = query.with_entities(*(columns[field].label(field) for field in selected))
+    for field in selected:
+        if joins and field in joins:
+            query = query.outerjoin(*joins[field])
+
+    def serialize(row):
+        item = {}
+        for field in fields:
+            value = getattr(row, field)
+            item[field] = value.isoformat() if isinstance(value, (date, datetime)) else value
+        return item
+
+    return query, serialize
+
+
+def paginate(query, id_column, sort_fields, default_sort):
+    """Return one keyset page of `query` and the cursor of the next page.
+
+    ``sort_fields`` maps the sort names clients may use to columns; ``id_column``
+    breaks ties so the order is total. Raises ValueError for invalid arguments.
+    """
+    sort, column, descending = _resolve_sort(sort_fields, default_sort)
+    cursor = request.args.get('cursor')
+    query = _order(query, column, id_column, descending)
+
+    # Without ?limit= or ?cursor= the client is not paging (e.g. an older frontend): return everything
+    if not request.args.get('limit') and not cursor:
+        return query.all(), None
+
+    limit = request.args.get('limit', type=int) or current_app.config['PAGE_SIZE_DEFAULT']
+    limit = max(1, min(limit, current_app.config['PAGE_SIZE_MAX']))
+
+    if cursor:
+        value, last_id = _decode_cursor(cursor, sort, column)
+        query = query.filter(_after(column, id_column, value, last_id, descending))
+
+    # Fetch one extra row to learn whether another page follows
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(sort, getattr(last, column.key), getattr(last, id_column.key))
+
+    return rows, next_cursor
+
+
+def paginated_response(items, next_cursor):
+    """Return a page as a JSON array, with the next cursor in the X-Next-Cursor and Link headers"""
+    response = jsonify(items)
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response, 200
+
+
+def stream_response(query, id_column, sort_fields, default_sort, serialize):
+    """Stream every row of `query` as a JSON array, encoding one row at a time.
+
+    Rows are fetched in batches of STREAM_BATCH_SIZE through a server-side cursor
+    (yield_per), so memory stays bounded however many rows are exported. Raises
+    ValueError for an invalid sort before anything is sent.
+    """
+    sort, column, descending = _resolve_sort(sort_fields, default_sort)
+    query = _order(query, column, id_column, descending)
+    query = query.yield_per(current_app.config['STREAM_BATCH_SIZE'])
+
+    def generate():
+        dumps = current_app.json.dumps
+        separator = '['
+        for row in query:
+            yield separator + dumps(serialize(row))
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json'), 200
@@ -1,7 +1,13 @@
 from flask import Blueprint, request, jsonify, send_file
 from flask_jwt_extended import jwt_required
-from app.models import Sale, SaleItem, Purchase, PurchaseItem, Product
+from app.models import Sale, SaleItem, Purchase, PurchaseItem, Product, Customer, DailySalesRollup, DailyPurchaseRollup
 from app import db
+from app.services.database import use_replica
+from app.services.report_cache import SALES, PURCHASES, PRODUCTS, CUSTOMERS, cached_report, remember_report, report_cache_stats
+from app.services.pricing import to_rupees
+from app.services.rollups import SALE_PAYMENT_METHODS, PURCHASE_PAYMENT_METHODS
+from sqlalchemy import and_, case, func, literal_column
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 import pandas as pd
 import os
@@ -15,9 +21,50 @@ REPORTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
 if not os.path.exists(REPORTS_FOLDER):
     os.makedirs(REPORTS_FOLDER)
 
+# Report type -> (period key in the output, SQLite strftime format, PostgreSQL to_char format)
+REPORT_PERIODS = {
+    'daily': ('date', '%Y-%m-%d', 'YYYY-MM-DD'),
+    'monthly': ('month', '%Y-%m', 'YYYY-MM'),
+    'yearly': ('year', '%Y', 'YYYY')
+}
+
+
+def report_period(date_column, report_type):
+    """Return (period key, SQL expression formatting a date column as its day, month or year)"""
+    key, sqlite_format, postgres_format = REPORT_PERIODS[report_type]
+    # Inline the format so GROUP BY and SELECT render the exact same expression
+    if db.engine.dialect.name == 'postgresql':
+        return key, func.to_char(date_column, literal_column(f"'{postgres_format}'"))
+    return key, func.strftime(literal_column(f"'{sqlite_format}'"), date_column)
+
+
+def gst_breakdown(rows):
+    """Turn (gst_percentage, hsn_code, taxable, gst, total) rows into per-rate and per-HSN totals"""
+    by_rate = {}
+    by_hsn = []
+    for gst_percentage, hsn_code, taxable_amount, gst_amount, total_amount in rows:
+        by_hsn.append({
+            'gst_percentage': gst_percentage,
+            'hsn_code': hsn_code,
+            'taxable_amount': taxable_amount or 0,
+            'gst_amount': gst_amount or 0,
+            'total_amount': total_amount or 0
+        })
+        rate = by_rate.setdefault(gst_percentage, {
+            'gst_percentage': gst_percentage,
+            'taxable_amount': 0,
+            'gst_amount': 0,
+            'total_amount': 0
+        })
+        rate['taxable_amount'] += taxable_amount or 0
+        rate['gst_amount'] += gst_amount or 0
+        rate['total_amount'] += total_amount or 0
+    return list(by_rate.values()), by_hsn
+
 
 @reports_bp.route('/sales', methods=['GET'])
 @jwt_required()
+@use_replica
 def sales_report():
     """Generate sales report with optional filtering"""
     # Get query parameters for filtering
@@ -41,87 +88,55 @@ def sales_report():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    # Query sales within date range
-    sales = Sale.query.filter(
-        Sale.sale_date >= start_date,
-        Sale.sale_date <= end_date
-    ).all()
-    
-    # Prepare data based on report type
-    if report_type == 'daily':
-        # Group by day
-        report_data = {}
-        for sale in sales:
-            date_str = sale.sale_date.strftime('%Y-%m-%d')
-            if date_str not in report_data:
-                report_data[date_str] = {
-                    'date': date_str,
-                    'total_sales': 0,
-                    'total_amount': 0,
-                    'total_gst': 0
-                }
-            report_data[date_str]['total_sales'] += 1
-            report_data[date_str]['total_amount'] += sale.total_amount
-            report_data[date_str]['total_gst'] += sale.gst_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-        
-    elif report_type == 'monthly':
-        # Group by month
-        report_data = {}
-        for sale in sales:
-            month_str = sale.sale_date.strftime('%Y-%m')
-            if month_str not in report_data:
-                report_data[month_str] = {
-                    'month': month_str,
-                    'total_sales': 0,
-                    'total_amount': 0,
-                    'total_gst': 0
-                }
-            report_data[month_str]['total_sales'] += 1
-            report_data[month_str]['total_amount'] += sale.total_amount
-            report_data[month_str]['total_gst'] += sale.gst_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-        
-    elif report_type == 'yearly':
-        # Group by year
-        report_data = {}
-        for sale in sales:
-            year_str = sale.sale_date.strftime('%Y')
-            if year_str not in report_data:
-                report_data[year_str] = {
-                    'year': year_str,
-                    'total_sales': 0,
-                    'total_amount': 0,
-                    'total_gst': 0
-                }
-            report_data[year_str]['total_sales'] += 1
-            report_data[year_str]['total_amount'] += sale.total_amount
-            report_data[year_str]['total_gst'] += sale.gst_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-    
-    else:
+    if report_type not in REPORT_PERIODS:
         return jsonify({'error': 'Invalid report type'}), 400
     
-    # Calculate summary
+    # Serve a repeated JSON report from the cache
+    cached = cached_report([SALES], start_date, end_date, type=report_type)
+    if cached:
+        return cached
+    
+    # Sum the daily rollup rows in the range by day, month or year: at most one row per day is read
+    key, period = report_period(DailySalesRollup.rollup_date, report_type)
+    payment_columns = [f'{method}_amount' for method in SALE_PAYMENT_METHODS + ('other',)]
+    rows = db.session.query(
+        period,
+        func.sum(DailySalesRollup.bill_count),
+        func.sum(DailySalesRollup.total_amount),
+        func.sum(DailySalesRollup.gst_amount),
+        func.sum(DailySalesRollup.discount),
+        *(func.sum(getattr(DailySalesRollup, column)) for column in payment_columns)
+    ).filter(
+        DailySalesRollup.rollup_date >= start_date,
+        DailySalesRollup.rollup_date <= end_date
+    ).group_by(period).order_by(period).all()
+    
+    # Rollup amounts are integer paise
+    result = [{
+        key: period_value,
+        'total_sales': total_sales,
+        'total_amount': to_rupees(total_amount),
+        'total_gst': to_rupees(total_gst),
+        'total_discount': to_rupees(total_discount),
+        **{column: to_rupees(amount) for column, amount in zip(payment_columns, payments)}
+    } for period_value, total_sales, total_amount, total_gst, total_discount, *payments in rows]
+    
+    # Calculate summary, adding paise so the totals are exact
     summary = {
         'period': f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}",
         'total_sales': sum(item['total_sales'] for item in result),
-        'total_amount': sum(item['total_amount'] for item in result),
-        'total_gst': sum(item['total_gst'] for item in result)
+        'total_amount': to_rupees(sum(row[2] for row in rows)),
+        'total_gst': to_rupees(sum(row[3] for row in rows))
     }
     
     # Return based on requested format
     if export_format == 'json':
-        return jsonify({
+        body = {
             'summary': summary,
             'data': result
-        }), 200
+        }
+        remember_report(body)
+        return jsonify(body), 200
     
     elif export_format in ['excel', 'csv']:
         # Create DataFrame
@@ -163,6 +178,7 @@ def sales_report():
 
 @reports_bp.route('/purchases', methods=['GET'])
 @jwt_required()
+@use_replica
 def purchases_report():
     """Generate purchases report with optional filtering"""
     # Get query parameters for filtering
@@ -186,80 +202,52 @@ def purchases_report():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
-    # Query purchases within date range
-    purchases = Purchase.query.filter(
-        Purchase.purchase_date >= start_date,
-        Purchase.purchase_date <= end_date
-    ).all()
-    
-    # Prepare data based on report type
-    if report_type == 'daily':
-        # Group by day
-        report_data = {}
-        for purchase in purchases:
-            date_str = purchase.purchase_date.strftime('%Y-%m-%d')
-            if date_str not in report_data:
-                report_data[date_str] = {
-                    'date': date_str,
-                    'total_purchases': 0,
-                    'total_amount': 0
-                }
-            report_data[date_str]['total_purchases'] += 1
-            report_data[date_str]['total_amount'] += purchase.total_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-        
-    elif report_type == 'monthly':
-        # Group by month
-        report_data = {}
-        for purchase in purchases:
-            month_str = purchase.purchase_date.strftime('%Y-%m')
-            if month_str not in report_data:
-                report_data[month_str] = {
-                    'month': month_str,
-                    'total_purchases': 0,
-                    'total_amount': 0
-                }
-            report_data[month_str]['total_purchases'] += 1
-            report_data[month_str]['total_amount'] += purchase.total_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-        
-    elif report_type == 'yearly':
-        # Group by year
-        report_data = {}
-        for purchase in purchases:
-            year_str = purchase.purchase_date.strftime('%Y')
-            if year_str not in report_data:
-                report_data[year_str] = {
-                    'year': year_str,
-                    'total_purchases': 0,
-                    'total_amount': 0
-                }
-            report_data[year_str]['total_purchases'] += 1
-            report_data[year_str]['total_amount'] += purchase.total_amount
-        
-        # Convert to list
-        result = list(report_data.values())
-    
-    else:
+    if report_type not in REPORT_PERIODS:
         return jsonify({'error': 'Invalid report type'}), 400
     
-    # Calculate summary
+    # Serve a repeated JSON report from the cache
+    cached = cached_report([PURCHASES], start_date, end_date, type=report_type)
+    if cached:
+        return cached
+    
+    # Sum the daily rollup rows in the range by day, month or year: at most one row per day is read
+    key, period = report_period(DailyPurchaseRollup.rollup_date, report_type)
+    payment_columns = [f'{method}_amount' for method in PURCHASE_PAYMENT_METHODS + ('other',)]
+    rows = db.session.query(
+        period,
+        func.sum(DailyPurchaseRollup.bill_count),
+        func.sum(DailyPurchaseRollup.total_amount),
+        func.sum(DailyPurchaseRollup.gst_amount),
+        *(func.sum(getattr(DailyPurchaseRollup, column)) for column in payment_columns)
+    ).filter(
+        DailyPurchaseRollup.rollup_date >= start_date,
+        DailyPurchaseRollup.rollup_date <= end_date
+    ).group_by(period).order_by(period).all()
+    
+    # Rollup amounts are integer paise
+    result = [{
+        key: period_value,
+        'total_purchases': total_purchases,
+        'total_amount': to_rupees(total_amount),
+        'total_gst': to_rupees(total_gst),
+        **{column: to_rupees(amount) for column, amount in zip(payment_columns, payments)}
+    } for period_value, total_purchases, total_amount, total_gst, *payments in rows]
+    
+    # Calculate summary, adding paise so the totals are exact
     summary = {
         'period': f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}",
         'total_purchases': sum(item['total_purchases'] for item in result),
-        'total_amount': sum(item['total_amount'] for item in result)
+        'total_amount': to_rupees(sum(row[2] for row in rows))
     }
     
     # Return based on requested format
     if export_format == 'json':
-        return jsonify({
+        body = {
             'summary': summary,
             'data': result
-        }), 200
+        }
+        remember_report(body)
+        return jsonify(body), 200
     
     elif export_format in ['excel', 'csv']:
         # Create DataFrame
@@ -301,6 +289,7 @@ def purchases_report():
 
 @reports_bp.route('/gst', methods=['GET'])
 @jwt_required()
+@use_replica
 def gst_report():
     """Generate GST report with optional filtering"""
     # Get query parameters for filtering
@@ -325,100 +314,49 @@ def gst_report():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
+    # Serve a repeated JSON report from the cache; HSN codes come from the products
+    sources = [PRODUCTS]
+    if report_type in ['sales', 'both']:
+        sources.append(SALES)
+    if report_type in ['purchases', 'both']:
+        sources.append(PURCHASES)
+    cached = cached_report(sources, start_date, end_date, type=report_type)
+    if cached:
+        return cached
+    
     result = {}
     
     # Get sales GST data if requested
     if report_type in ['sales', 'both']:
-        # Query sales within date range
-        sales = Sale.query.filter(
+        # Sum the sale lines in the range by GST rate and HSN code in one joined query
+        rows = db.session.query(
+            SaleItem.gst_percentage,
+            Product.hsn_code,
+            func.sum(SaleItem.total_price - SaleItem.gst_amount),
+            func.sum(SaleItem.gst_amount),
+            func.sum(SaleItem.total_price)
+        ).join(Sale, SaleItem.sale_id == Sale.id).outerjoin(Product, SaleItem.product_id == Product.id).filter(
             Sale.sale_date >= start_date,
             Sale.sale_date <= end_date
-        ).all()
-        
-        # Get all sale items
-        sale_items = []
-        for sale in sales:
-            for item in sale.items:
-                sale_items.append({
-                    'invoice_number': sale.invoice_number,
-                    'date': sale.sale_date.strftime('%Y-%m-%d'),
-                    'product_name': item.product.name,
-                    'hsn_code': item.product.hsn_code,
-                    'quantity': item.quantity,
-                    'unit_price': item.unit_price,
-                    'gst_percentage': item.gst_percentage,
-                    'gst_amount': item.gst_amount,
-                    'total_price': item.total_price
-                })
+        ).group_by(SaleItem.gst_percentage, Product.hsn_code).order_by(SaleItem.gst_percentage, Product.hsn_code).all()
         
-        # Group by GST percentage
-        sales_gst_data = {}
-        for item in sale_items:
-            gst_key = str(item['gst_percentage'])
-            if gst_key not in sales_gst_data:
-                sales_gst_data[gst_key] = {
-                    'gst_percentage': item['gst_percentage'],
-                    'taxable_amount': 0,
-                    'gst_amount': 0,
-                    'total_amount': 0
-                }
-            
-            # Calculate taxable amount (price before GST)
-            taxable_amount = item['total_price'] - item['gst_amount']
-            
-            sales_gst_data[gst_key]['taxable_amount'] += taxable_amount
-            sales_gst_data[gst_key]['gst_amount'] += item['gst_amount']
-            sales_gst_data[gst_key]['total_amount'] += item['total_price']
-        
-        result['sales_gst'] = list(sales_gst_data.values())
+        result['sales_gst'], result['sales_gst_by_hsn'] = gst_breakdown(rows)
     
     # Get purchases GST data if requested
     if report_type in ['purchases', 'both']:
-        # Query purchases within date range
-        purchases = Purchase.query.filter(
+        # Sum the purchase lines in the range by their stored GST rate and HSN code in one joined query
+        rows = db.session.query(
+            PurchaseItem.gst_percentage,
+            Product.hsn_code,
+            func.sum(PurchaseItem.total_price - PurchaseItem.gst_amount),
+            func.sum(PurchaseItem.gst_amount),
+            func.sum(PurchaseItem.total_price)
+        ).join(Purchase, PurchaseItem.purchase_id == Purchase.id).outerjoin(Product, PurchaseItem.product_id == Product.id).filter(
             Purchase.purchase_date >= start_date,
             Purchase.purchase_date <= end_date
-        ).all()
-        
-        # Get all purchase items
-        purchase_items = []
-        for purchase in purchases:
-            for item in purchase.items:
-                purchase_items.append({
-                    'invoice_number': purchase.invoice_number,
-                    'date': purchase.purchase_date.strftime('%Y-%m-%d'),
-                    'product_name': item.product.name,
-                    'hsn_code': item.product.hsn_code,
-                    'quantity': item.quantity,
-                    'unit_price': item.unit_price,
-                    'gst_amount': item.gst_amount,
-                    'total_price': item.total_price
-                })
-        
-        # Group by GST amount
-        purchases_gst_data = {}
-        for item in purchase_items:
-            # Calculate approximate GST percentage
-            taxable_amount = item['total_price'] - item['gst_amount']
-            if taxable_amount > 0:
-                gst_percentage = round((item['gst_amount'] / taxable_amount) * 100, 2)
-            else:
-                gst_percentage = 0
-            
-            gst_key = str(gst_percentage)
-            if gst_key not in purchases_gst_data:
-                purchases_gst_data[gst_key] = {
-                    'gst_percentage': gst_percentage,
-                    'taxable_amount': 0,
-                    'gst_amount': 0,
-                    'total_amount': 0
-                }
-            
-            purchases_gst_data[gst_key]['taxable_amount'] += taxable_amount
-            purchases_gst_data[gst_key]['gst_amount'] += item['gst_amount']
-            purchases_gst_data[gst_key]['total_amount'] += item['total_price']
+        ).group_by(PurchaseItem.gst_percentage, Product.hsn_code).order_by(PurchaseItem.gst_percentage, Product.hsn_code).all()
         
-        result['purchases_gst'] = list(purchases_gst_data.values())
+        result['purchases_gst'], result['purchases_gst_by_hsn'] = gst_breakdown(rows)
     
     # Calculate summary
     summary = {
@@ -441,10 +379,12 @@ def gst_report():
     
     # Return based on requested format
     if export_format == 'json':
-        return jsonify({
+        body = {
             'summary': summary,
             'data': result
-        }), 200
+        }
+        remember_report(body)
+        return jsonify(body), 200
     
     elif export_format in ['excel', 'csv']:
         # Create file
@@ -460,9 +400,11 @@ def gst_report():
                 # Add data sheets
                 if report_type in ['sales', 'both'] and 'sales_gst' in result:
                     pd.DataFrame(result['sales_gst']).to_excel(writer, sheet_name='Sales GST', index=False)
+                    pd.DataFrame(result['sales_gst_by_hsn']).to_excel(writer, sheet_name='Sales GST by HSN', index=False)
                 
                 if report_type in ['purchases', 'both'] and 'purchases_gst' in result:
                     pd.DataFrame(result['purchases_gst']).to_excel(writer, sheet_name='Purchases GST', index=False)
+                    pd.DataFrame(result['purchases_gst_by_hsn']).to_excel(writer, sheet_name='Purchases GST by HSN', index=False)
             
             # Return file
             return send_file(
@@ -500,8 +442,148 @@ def gst_report():
         return jsonify({'error': 'Invalid export format'}), 400
 
 
+@reports_bp.route('/gst/hsn', methods=['GET'])
+@jwt_required()
+@use_replica
+def gst_hsn_report():
+    """Generate the HSN-wise summary of sales (GSTR-1 style), split into B2B and B2C"""
+    # Get query parameters for filtering
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    export_format = request.args.get('format', 'json')  # 'json', 'excel', 'csv'
+    
+    if export_format not in ['json', 'excel', 'csv']:
+        return jsonify({'error': 'Invalid export format'}), 400
+    
+    # Parse dates
+    try:
+        if start_date:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        else:
+            # Default to current month
+            today = datetime.now().date()
+            start_date = datetime(today.year, today.month, 1).date()
+        
+        if end_date:
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+        else:
+            end_date = datetime.now().date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    
+    # Serve a repeated JSON report from the cache; B2B/B2C follows the customers' GSTINs
+    cached = cached_report([SALES, PRODUCTS, CUSTOMERS], start_date, end_date)
+    if cached:
+        return cached
+    
+    # Classify every sale line in the range: B2B when the customer has a GSTIN, B2C otherwise
+    # (walk-in sales included), with its tax split into IGST or CGST + SGST
+    lines = db.session.query(
+        Product.hsn_code.label('hsn_code'),
+        SaleItem.gst_percentage.label('gst_percentage'),
+        case(
+            (and_(Customer.gst_number.isnot(None), Customer.gst_number != ''), 'B2B'),
+            else_='B2C'
+        ).label('supply_type'),
+        SaleItem.quantity.label('quantity'),
+        (SaleItem.total_price - SaleItem.gst_amount).label('taxable_value'),
+        case((Sale.is_interstate, SaleItem.gst_amount), else_=0).label('igst_amount'),
+        case((Sale.is_interstate, 0), else_=SaleItem.gst_amount / 2).label('cgst_amount'),
+        SaleItem.gst_amount.label('total_tax'),
+        SaleItem.total_price.label('total_value')
+    ).join(Sale, SaleItem.sale_id == Sale.id).outerjoin(Customer, Sale.customer_id == Customer.id).outerjoin(
+        Product, SaleItem.product_id == Product.id
+    ).filter(
+        Sale.sale_date >= start_date,
+        Sale.sale_date <= end_date
+    ).subquery()
+    
+    # Sum them by HSN code, rate and supply type; the line subquery is part of the same statement
+    rows = db.session.query(
+        lines.c.supply_type,
+        lines.c.hsn_code,
+        lines.c.gst_percentage,
+        func.sum(lines.c.quantity),
+        func.sum(lines.c.taxable_value),
+        func.sum(lines.c.igst_amount),
+        func.sum(lines.c.cgst_amount),
+        func.sum(lines.c.total_tax),
+        func.sum(lines.c.total_value)
+    ).group_by(
+        lines.c.supply_type, lines.c.hsn_code, lines.c.gst_percentage
+    ).order_by(
+        lines.c.supply_type, lines.c.hsn_code, lines.c.gst_percentage
+    ).all()
+    
+    # CGST and SGST are always equal halves of intra-state GST
+    result = [{
+        'supply_type': supply_type,
+        'hsn_code': hsn_code,
+        'gst_percentage': gst_percentage,
+        'quantity': quantity,
+        'taxable_value': taxable_value,
+        'igst_amount': igst_amount,
+        'cgst_amount': cgst_amount,
+        'sgst_amount': cgst_amount,
+        'total_tax': total_tax,
+        'total_value': total_value
+    } for supply_type, hsn_code, gst_percentage, quantity, taxable_value, igst_amount, cgst_amount, total_tax, total_value in rows]
+    
+    # Calculate summary
+    summary = {
+        'period': f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+    }
+    for supply_type in ['B2B', 'B2C']:
+        supply_rows = [row for row in result if row['supply_type'] == supply_type]
+        for field in ['taxable_value', 'igst_amount', 'cgst_amount', 'sgst_amount', 'total_tax', 'total_value']:
+            summary[f'{supply_type.lower()}_{field}'] = sum(row[field] for row in supply_rows)
+    
+    # Return based on requested format
+    if export_format == 'json':
+        body = {
+            'summary': summary,
+            'data': result
+        }
+        remember_report(body)
+        return jsonify(body), 200
+    
+    # Create file
+    filename = f"gst_hsn_report_{uuid.uuid4()}"
+    file_path = os.path.join(REPORTS_FOLDER, filename)
+    
+    if export_format == 'excel':
+        # GSTR-1 reports the HSN summary for B2B and B2C supplies in separate tables
+        with pd.ExcelWriter(file_path + '.xlsx') as writer:
+            pd.DataFrame([summary]).to_excel(writer, sheet_name='Summary', index=False)
+            for supply_type in ['B2B', 'B2C']:
+                pd.DataFrame(
+                    [row for row in result if row['supply_type'] == supply_type],
+                    columns=list(result[0]) if result else None
+                ).to_excel(writer, sheet_name=f'HSN {supply_type}', index=False)
+        
+        # Return file
+        return send_file(
+            file_path + '.xlsx',
+            as_attachment=True,
+            download_name='gst_hsn_report.xlsx',
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    
+    # CSV: one row per supply type, HSN code and rate
+    pd.DataFrame(result).to_csv(file_path + '.csv', index=False)
+    
+    # Return file
+    return send_file(
+        file_path + '.csv',
+        as_attachment=True,
+        download_name='gst_hsn_report.csv',
+        mimetype='text/csv'
+    )
+
+
 @reports_bp.route('/inventory', methods=['GET'])
 @jwt_required()
+@use_replica
 def inventory_report():
     """Generate inventory report"""
     # Get query parameters
@@ -509,8 +591,13 @@ def inventory_report():
     low_stock = request.args.get('low_stock', type=bool, default=False)
     export_format = request.args.get('format', 'json')  # 'json', 'excel', 'csv'
     
-    # Start with base query
-    query = Product.query
+    # Serve a repeated JSON report from the cache; stock changes with every bill
+    cached = cached_report([SALES, PURCHASES, PRODUCTS], category_id=category_id, low_stock=low_stock)
+    if cached:
+        return cached
+    
+    # Start with base query, loading categories in the same statement
+    query = Product.query.options(joinedload(Product.category))
     
     # Apply filters if provided
     if category_id:
@@ -549,10 +636,12 @@ def inventory_report():
     
     # Return based on requested format
     if export_format == 'json':
-        return jsonify({
+        body = {
             'summary': summary,
             'data': inventory_data
-        }), 200
+        }
+        remember_report(body)
+        return jsonify(body), 200
     
     elif export_format in ['excel', 'csv']:
         # Create DataFrame
@@ -589,4 +678,11 @@ def inventory_report():
             )
     
     else:
-        return jsonify({'error': 'Invalid export format'}), 400
\ No newline at end of file
+        return jsonify({'error': 'Invalid export format'}), 400
+
+
+@reports_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def get_report_cache_stats():
+    """Get the report cache size and hit/miss counters"""
+    return jsonify(report_cache_stats()), 200
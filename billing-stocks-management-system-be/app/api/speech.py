@@ -5,6 +5,7 @@ import uuid
 import speech_recognition as sr
 from google.cloud import speech_v1p1beta1 as speech
 from google.cloud import translate_v2 as translate
+from app.services.product_matcher import match_text
 
 speech_bp = Blueprint('speech', __name__)
 
@@ -141,6 +142,10 @@ def recognize_speech():
         if 'translated_text' in translation:
             result['translated_text'] = translation['translated_text']
     
+    # Match the text against the product catalog if requested
+    if request.form.get('match_products', 'false').lower() == 'true':
+        result['products'] = match_text(result.get('translated_text') or result.get('text', ''))
+    
     return jsonify(result), 200
 
 
@@ -3,6 +3,10 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.models import User
 from app import db
 from app.api.users import users_bp
+from app.api.pagination import filter_by_args, paginate, paginated_response
+
+# Fields the user listing can be sorted by
+USER_SORT_FIELDS = {'id': User.id, 'username': User.username, 'created_at': User.created_at}
 
 # Helper function to check if user is admin
 def is_admin():
@@ -12,11 +16,15 @@ def is_admin():
 @users_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_users():
-    """Get all users (admin only)"""
+    """Get users, one keyset page at a time (admin only)"""
     if not is_admin():
         return jsonify({'error': 'Admin access required'}), 403
     
-    users = User.query.all()
+    try:
+        query = filter_by_args(User.query, {'role': User.role})
+        users, next_cursor = paginate(query, User.id, USER_SORT_FIELDS, 'username')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     users_list = []
     
     for user in users:
@@ -30,7 +38,7 @@ def get_users():
             'created_at': user.created_at.isoformat()
         })
     
-    return jsonify(users_list), 200
+    return paginated_response(users_list, next_cursor)
 
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
@@ -3,27 +3,51 @@ from flask_jwt_extended import jwt_required
 from app.models import Vendor
 from app import db
 from app.api.vendors import vendors_bp
+from app.api.pagination import filter_by_args, paginate, paginated_response, select_fields
+
+# Fields the vendor listing can be sorted by
+VENDOR_SORT_FIELDS = {'id': Vendor.id, 'name': Vendor.name, 'created_at': Vendor.created_at}
+
+# Fields the vendor listing can be narrowed to with ?fields=
+VENDOR_FIELDS = {
+    'id': Vendor.id,
+    'name': Vendor.name,
+    'contact_person': Vendor.contact_person,
+    'phone': Vendor.phone,
+    'email': Vendor.email,
+    'address': Vendor.address,
+    'gst_number': Vendor.gst_number,
+    'created_at': Vendor.created_at
+}
+
+
+def vendor_summary(vendor):
+    """Serialize a vendor for the vendor listing"""
+    return {
+        'id': vendor.id,
+        'name': vendor.name,
+        'contact_person': vendor.contact_person,
+        'phone': vendor.phone,
+        'email': vendor.email,
+        'address': vendor.address,
+        'gst_number': vendor.gst_number,
+        'created_at': vendor.created_at.isoformat()
+    }
+
 
 @vendors_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_vendors():
-    """Get all vendors"""
-    vendors = Vendor.query.all()
-    vendors_list = []
-    
-    for vendor in vendors:
-        vendors_list.append({
-            'id': vendor.id,
-            'name': vendor.name,
-            'contact_person': vendor.contact_person,
-            'phone': vendor.phone,
-            'email': vendor.email,
-            'address': vendor.address,
-            'gst_number': vendor.gst_number,
-            'created_at': vendor.created_at.isoformat()
-        })
-    
-    return jsonify(vendors_list), 200
+    """Get vendors, one keyset page at a time"""
+    try:
+        query = filter_by_args(Vendor.query, {'gst_number': Vendor.gst_number})
+        query, serialize = select_fields(query, VENDOR_FIELDS, VENDOR_SORT_FIELDS, 'name')
+        vendors, next_cursor = paginate(query, Vendor.id, VENDOR_SORT_FIELDS, 'name')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    serialize = serialize or vendor_summary
+    return paginated_response([serialize(vendor) for vendor in vendors], next_cursor)
 
 
 @vendors_bp.route('/<int:vendor_id>', methods=['GET'])
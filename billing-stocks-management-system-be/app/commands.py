@@ -0,0 +1,44 @@
+from flask.cli import AppGroup
+from app.services.stock_ledger import backfill_ledger, create_checkpoints
+from app.services.rollups import rebuild_rollups
+from datetime import date, datetime, timedelta
+import click
+
+stock_cli = AppGroup('stock', help='Stock ledger maintenance')
+rollup_cli = AppGroup('rollups', help='Daily report rollup maintenance')
+
+
+@stock_cli.command('backfill')
+def backfill_command():
+    """Build the stock ledger from existing sales and purchases"""
+    try:
+        backfill_ledger()
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo('Stock ledger backfilled')
+
+
+@stock_cli.command('checkpoint')
+@click.option('--date', 'as_of', help='Day to checkpoint (YYYY-MM-DD), defaults to yesterday')
+def checkpoint_command(as_of):
+    """Store on-hand quantities at the end of a day"""
+    try:
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else date.today() - timedelta(days=1)
+        count = create_checkpoints(as_of)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Checkpointed {count} products as of {as_of.isoformat()}')
+
+
+@rollup_cli.command('rebuild')
+@click.option('--start', 'start_date', help='First day to rebuild (YYYY-MM-DD), defaults to the first bill')
+@click.option('--end', 'end_date', help='Last day to rebuild (YYYY-MM-DD), defaults to the last bill')
+def rebuild_command(start_date, end_date):
+    """Recompute the daily sales and purchase rollups from the bills"""
+    try:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    sales_days, purchase_days = rebuild_rollups(start_date, end_date)
+    click.echo(f'Rebuilt {sales_days} days of sales and {purchase_days} days of purchases')
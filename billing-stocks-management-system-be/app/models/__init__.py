@@ -8,6 +8,10 @@ from app.models.customer import Customer
 from app.models.sale import Sale, SaleItem
 from app.models.backup import Backup
 from app.models.ocr_scan import OCRScan
+from app.models.invoice_sequence import InvoiceSequence
+from app.models.idempotency_key import IdempotencyKey
+from app.models.stock_movement import StockMovement, StockCheckpoint
+from app.models.daily_rollup import DailySalesRollup, DailyPurchaseRollup
 
 # This allows importing all models from app.models directly
 __all__ = [
@@ -21,5 +25,11 @@ __all__ = [
     'Sale',
     'SaleItem',
     'Backup',
-    'OCRScan'
+    'OCRScan',
+    'InvoiceSequence',
+    'IdempotencyKey',
+    'StockMovement',
+    'StockCheckpoint',
+    'DailySalesRollup',
+    'DailyPurchaseRollup'
 ]
\ No newline at end of file
@@ -1,5 +1,14 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import validates
+import re
+
+
+def normalize_phone(phone):
+    """Reduce a phone number to its last 10 digits, so '+91 98765-43210' matches '09876543210'"""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] or None
+
 
 class Customer(db.Model):
     """Customer model"""
@@ -8,14 +17,30 @@ class Customer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
+    phone_normalized = db.Column(db.String(20), nullable=True, index=True)  # Kept in sync with phone
     email = db.Column(db.String(120), nullable=True)
     address = db.Column(db.Text, nullable=True)
-    gst_number = db.Column(db.String(20), nullable=True)
+    gst_number = db.Column(db.String(20), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Case-insensitive name prefix lookups for typeahead
+    __table_args__ = (
+        db.Index('ix_customers_name_lower', db.func.lower(name)),
+    )
+    
     # Relationships
     sales = db.relationship('Sale', backref='customer', lazy=True)
     
+    @validates('phone')
+    def validate_phone(self, key, phone):
+        self.phone_normalized = normalize_phone(phone)
+        return phone
+    
+    @validates('gst_number')
+    def validate_gst_number(self, key, gst_number):
+        # GSTINs are upper-case; store them that way so lookups can use the index
+        return gst_number.strip().upper() if gst_number else gst_number
+    
     def __repr__(self):
-        return f'<Customer {self.name}>'
\ No newline at end of file
+        return f'<Customer {self.name}>'
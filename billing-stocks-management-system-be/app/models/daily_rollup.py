@@ -0,0 +1,53 @@
+from app import db
+from datetime import datetime
+
+class DailySalesRollup(db.Model):
+    """Sales totals for one day in integer paise, kept up to date with every bill so reports never scan the sales table"""
+    __tablename__ = 'daily_sales_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rollup_date = db.Column(db.Date, nullable=False)
+    bill_count = db.Column(db.Integer, nullable=False, default=0)
+    subtotal = db.Column(db.BigInteger, nullable=False, default=0)
+    discount = db.Column(db.BigInteger, nullable=False, default=0)
+    gst_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    total_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    # Bill totals split by payment method
+    cash_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    credit_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    upi_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    card_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    other_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('rollup_date', name='uq_daily_sales_rollup_date'),
+    )
+    
+    def __repr__(self):
+        return f'<DailySalesRollup {self.rollup_date}>'
+
+
+class DailyPurchaseRollup(db.Model):
+    """Purchase totals for one day, kept up to date with every purchase (amounts in integer paise)"""
+    __tablename__ = 'daily_purchase_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    rollup_date = db.Column(db.Date, nullable=False)
+    bill_count = db.Column(db.Integer, nullable=False, default=0)
+    gst_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    total_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    # Purchase totals split by payment method ('other' includes purchases without one)
+    cash_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    credit_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    upi_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    bank_transfer_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    other_amount = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('rollup_date', name='uq_daily_purchase_rollup_date'),
+    )
+    
+    def __repr__(self):
+        return f'<DailyPurchaseRollup {self.rollup_date}>'
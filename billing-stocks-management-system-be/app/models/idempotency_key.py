@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Stored response for a request sent with an Idempotency-Key header"""
+    __tablename__ = 'idempotency_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), nullable=False)
+    endpoint = db.Column(db.String(100), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the request body
+    status_code = db.Column(db.Integer, nullable=False)
+    response_body = db.Column(db.Text, nullable=False)  # JSON string of the original response
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('key', 'endpoint', name='uq_idempotency_keys_key_endpoint'),
+    )
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}>'
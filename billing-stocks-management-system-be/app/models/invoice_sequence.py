@@ -0,0 +1,17 @@
+from app import db
+
+class InvoiceSequence(db.Model):
+    """Invoice number sequence per prefix and financial year"""
+    __tablename__ = 'invoice_sequences'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prefix = db.Column(db.String(10), nullable=False)
+    financial_year = db.Column(db.String(7), nullable=False)  # e.g. '2025-26'
+    next_value = db.Column(db.Integer, nullable=False, default=1)  # First number not yet reserved
+    
+    __table_args__ = (
+        db.UniqueConstraint('prefix', 'financial_year', name='uq_invoice_sequences_prefix_year'),
+    )
+    
+    def __repr__(self):
+        return f'<InvoiceSequence {self.prefix} {self.financial_year}>'
@@ -17,8 +17,8 @@ class Product(db.Model):
     low_stock_threshold = db.Column(db.Integer, default=10)
     gst_percentage = db.Column(db.Float, default=0)  # GST percentage
     hsn_code = db.Column(db.String(20), nullable=True)  # HSN code for GST
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
-    vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'), nullable=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True, index=True)
+    vendor_id = db.Column(db.Integer, db.ForeignKey('vendors.id'), nullable=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -16,6 +16,12 @@ class Purchase(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Date-range reports, and per-vendor history within a date range
+    __table_args__ = (
+        db.Index('ix_purchases_purchase_date', 'purchase_date'),
+        db.Index('ix_purchases_vendor_date', 'vendor_id', 'purchase_date'),
+    )
+    
     # Relationships
     items = db.relationship('PurchaseItem', backref='purchase', lazy=True, cascade='all, delete-orphan')
     
@@ -32,8 +38,15 @@ class PurchaseItem(db.Model):
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     unit_price = db.Column(db.Float, nullable=False)
+    gst_percentage = db.Column(db.Float, default=0)
     gst_amount = db.Column(db.Float, default=0)
     total_price = db.Column(db.Float, nullable=False)
     
+    # Loading a purchase's items, and a product's purchases
+    __table_args__ = (
+        db.Index('ix_purchase_items_purchase_id', 'purchase_id'),
+        db.Index('ix_purchase_items_product_purchase', 'product_id', 'purchase_id'),
+    )
+    
     def __repr__(self):
         return f'<PurchaseItem {self.id}>'
\ No newline at end of file
@@ -13,12 +13,19 @@ class Sale(db.Model):
     discount = db.Column(db.Float, default=0)
     gst_amount = db.Column(db.Float, default=0)
     total_amount = db.Column(db.Float, nullable=False)
+    is_interstate = db.Column(db.Boolean, nullable=False, default=False)  # GST charged as IGST instead of CGST + SGST
     payment_status = db.Column(db.String(20), default='paid')  # 'pending', 'partial', 'paid'
     payment_method = db.Column(db.String(20), default='cash')  # 'cash', 'credit', 'upi', 'card'
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Date-range reports, and per-customer history within a date range
+    __table_args__ = (
+        db.Index('ix_sales_sale_date', 'sale_date'),
+        db.Index('ix_sales_customer_date', 'customer_id', 'sale_date'),
+    )
+    
     # Relationships
     items = db.relationship('SaleItem', backref='sale', lazy=True, cascade='all, delete-orphan')
     
@@ -40,5 +47,11 @@ class SaleItem(db.Model):
     discount = db.Column(db.Float, default=0)
     total_price = db.Column(db.Float, nullable=False)
     
+    # Loading a sale's items, and a product's sales
+    __table_args__ = (
+        db.Index('ix_sale_items_sale_id', 'sale_id'),
+        db.Index('ix_sale_items_product_sale', 'product_id', 'sale_id'),
+    )
+    
     def __repr__(self):
         return f'<SaleItem {self.id}>'
\ No newline at end of file
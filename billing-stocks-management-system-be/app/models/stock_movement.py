@@ -0,0 +1,39 @@
+from app import db
+from datetime import datetime
+
+class StockMovement(db.Model):
+    """Append-only ledger entry for a change in a product's stock"""
+    __tablename__ = 'stock_movements'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)  # Signed: positive adds stock, negative removes it
+    movement_type = db.Column(db.String(20), nullable=False)  # 'opening', 'sale', 'purchase', 'adjustment'
+    reference_id = db.Column(db.Integer, nullable=True)  # Sale or purchase ID for 'sale' and 'purchase' movements
+    movement_date = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_stock_movements_product_date', 'product_id', 'movement_date'),
+    )
+    
+    def __repr__(self):
+        return f'<StockMovement {self.product_id} {self.quantity:+d}>'
+
+
+class StockCheckpoint(db.Model):
+    """On-hand quantity of a product at the end of a day, so as-of queries need not replay all history"""
+    __tablename__ = 'stock_checkpoints'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    checkpoint_date = db.Column(db.Date, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('product_id', 'checkpoint_date', name='uq_stock_checkpoints_product_date'),
+    )
+    
+    def __repr__(self):
+        return f'<StockCheckpoint {self.product_id} {self.checkpoint_date}>'
@@ -0,0 +1,188 @@
+from flask import current_app
+from sqlalchemy import or_
+from app import db
+from app.models import Product
+from collections import OrderedDict, namedtuple
+import threading
+import time
+
+# In-process product catalog cache, used to price and look up products without
+# touching the products table. Entries are keyed by product ID, with SKU and
+# barcode indexes on top, and the least recently used entry is evicted once
+# CATALOG_CACHE_SIZE products are cached. Write paths call invalidate_catalog()
+# after committing; CATALOG_CACHE_TTL_SECONDS bounds how long a change made by
+# another worker process can go unnoticed. Stock levels are deliberately not
+# cached: they change with every bill.
+
+CatalogEntry = namedtuple('CatalogEntry', [
+    'id', 'name', 'sku', 'barcode', 'purchase_price', 'selling_price', 'wholesale_price',
+    'gst_percentage', 'hsn_code', 'low_stock_threshold'
+])
+
+_COLUMNS = [getattr(Product, field) for field in CatalogEntry._fields]
+
+
+class _CatalogCache:
+    """Bounded LRU map of product ID to CatalogEntry, with SKU and barcode indexes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # product_id -> (CatalogEntry, loaded_at)
+        self._codes = {}  # sku or barcode -> product_id, for cached entries only
+        self._generation = 0  # Bumped on every invalidation so a load racing a write is discarded
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, product_id, now):
+        """Return the cached entry if it has not expired, marking it recently used"""
+        cached = self._entries.get(product_id)
+        if cached is None:
+            return None
+        entry, loaded_at = cached
+        if now - loaded_at >= current_app.config['CATALOG_CACHE_TTL_SECONDS']:
+            self._drop(product_id)
+            return None
+        self._entries.move_to_end(product_id)
+        return entry
+
+    def _drop(self, product_id):
+        """Remove one entry and its codes (caller holds the lock)"""
+        cached = self._entries.pop(product_id, None)
+        if cached is None:
+            return
+        for code in (cached[0].sku, cached[0].barcode):
+            if code and self._codes.get(code) == product_id:
+                del self._codes[code]
+
+    def _store(self, entries, generation):
+        """Cache freshly loaded entries unless a write happened while they were read"""
+        if generation != self._generation:
+            return
+        now = time.monotonic()
+        max_size = current_app.config['CATALOG_CACHE_SIZE']
+        for entry in entries:
+            self._drop(entry.id)
+            self._entries[entry.id] = (entry, now)
+            for code in (entry.sku, entry.barcode):
+                if code:
+                    self._codes[code] = entry.id
+        while len(self._entries) > max_size:
+            self._drop(next(iter(self._entries)))
+
+    def get_many(self, product_ids):
+        """Return {product_id: CatalogEntry}, loading all misses with one query"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for product_id in set(product_ids):
+                entry = self._fresh(product_id, now)
+                if entry is not None:
+                    found[product_id] = entry
+            missing = set(product_ids) - set(found)
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if missing:
+            rows = db.session.query(*_COLUMNS).filter(Product.id.in_(missing)).all()
+            entries = [CatalogEntry(*row) for row in rows]
+            with self._lock:
+                self._store(entries, generation)
+            found.update((entry.id, entry) for entry in entries)
+        return found
+
+    def get_many_by_code(self, codes):
+        """Return {code: CatalogEntry} for barcodes or SKUs, loading all misses with one query"""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for code in set(codes):
+                product_id = self._codes.get(code)
+                entry = self._fresh(product_id, now) if product_id is not None else None
+                if entry is not None and code in (entry.barcode, entry.sku):
+                    found[code] = entry
+            missing = set(codes) - set(found)
+            self.hits += len(found)
+            self.misses += len(missing)
+            generation = self._generation
+
+        if missing:
+            # Both columns are uniquely indexed, so this is two index probes per code
+            rows = db.session.query(*_COLUMNS).filter(
+                or_(Product.barcode.in_(missing), Product.sku.in_(missing))
+            ).all()
+            entries = [CatalogEntry(*row) for row in rows]
+            with self._lock:
+                self._store(entries, generation)
+            # Barcodes take precedence over SKUs if a code happens to be both
+            for entry in entries:
+                if entry.sku in missing:
+                    found.setdefault(entry.sku, entry)
+            for entry in entries:
+                if entry.barcode in missing:
+                    found[entry.barcode] = entry
+        return found
+
+    def warm(self):
+        """Load up to CATALOG_CACHE_SIZE products, newest first, into the cache"""
+        with self._lock:
+            generation = self._generation
+        rows = db.session.query(*_COLUMNS).order_by(Product.id.desc()).limit(
+            current_app.config['CATALOG_CACHE_SIZE']
+        ).all()
+        entries = [CatalogEntry(*row) for row in reversed(rows)]
+        with self._lock:
+            self._store(entries, generation)
+        return len(entries)
+
+    def invalidate(self, product_ids=None):
+        """Drop the given products, or every product, from the cache"""
+        with self._lock:
+            self._generation += 1
+            if product_ids is None:
+                self._entries.clear()
+                self._codes.clear()
+            else:
+                for product_id in product_ids:
+                    self._drop(product_id)
+
+    def stats(self):
+        """Return the cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': current_app.config['CATALOG_CACHE_SIZE'],
+                'ttl_seconds': current_app.config['CATALOG_CACHE_TTL_SECONDS'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+_cache = _CatalogCache()
+
+
+def catalog_entries(product_ids):
+    """Return {product_id: CatalogEntry} for the given IDs; unknown IDs are left out"""
+    return _cache.get_many(product_ids)
+
+
+def catalog_entries_by_code(codes):
+    """Return {code: CatalogEntry} for barcodes or SKUs; unknown codes are left out"""
+    return _cache.get_many_by_code(codes)
+
+
+def warm_catalog():
+    """Fill the cache ahead of the first scan; returns the number of products loaded"""
+    return _cache.warm()
+
+
+def invalidate_catalog(product_ids=None):
+    """Drop changed products from the cache after committing; None drops everything"""
+    _cache.invalidate(product_ids)
+
+
+def catalog_stats():
+    """Return the catalog cache size and hit/miss counters"""
+    return _cache.stats()
@@ -0,0 +1,108 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from functools import wraps
+
+# Engine profiles applied by create_app. SQLite is tuned for several counters
+# billing at once from a multi-threaded gunicorn worker (--threads N): WAL lets
+# readers run alongside the single writer, busy_timeout makes a second writer
+# wait for the lock instead of failing with "database is locked", and the pool
+# keeps one connection per thread so the per-connection page cache stays warm.
+#
+# PostgreSQL gets a bounded pool with pre-ping, so connections dropped by the
+# server or a proxy are replaced instead of failing the next request. When
+# DATABASE_REPLICA_URL is set, views decorated with @use_replica read from that
+# read-only replica; their writes, and every other view, stay on the primary.
+
+REPLICA_BIND = 'replica'
+
+
+def is_sqlite(database_uri):
+    """Return True if the URI points at a SQLite database"""
+    return make_url(database_uri).get_backend_name() == 'sqlite'
+
+
+def engine_options(config, database_uri=None):
+    """Return SQLAlchemy engine options for a database (the primary by default)"""
+    url = make_url(database_uri or config['SQLALCHEMY_DATABASE_URI'])
+    backend = url.get_backend_name()
+    if backend == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # An in-memory database only exists on its one connection
+            return {}
+        return {
+            'pool_size': config['SQLITE_POOL_SIZE'],
+            'max_overflow': config['SQLITE_POOL_MAX_OVERFLOW'],
+            'pool_timeout': config['SQLITE_POOL_TIMEOUT'],
+            'connect_args': {'check_same_thread': False}
+        }
+    if backend == 'postgresql':
+        return {
+            'pool_size': config['POSTGRES_POOL_SIZE'],
+            'max_overflow': config['POSTGRES_POOL_MAX_OVERFLOW'],
+            'pool_timeout': config['POSTGRES_POOL_TIMEOUT'],
+            'pool_recycle': config['POSTGRES_POOL_RECYCLE'],
+            'pool_pre_ping': True
+        }
+    return {}
+
+
+def replica_binds(config):
+    """Return SQLALCHEMY_BINDS with the read replica, if DATABASE_REPLICA_URL is set"""
+    replica_uri = config.get('DATABASE_REPLICA_URL')
+    if not replica_uri:
+        return {}
+    return {REPLICA_BIND: {'url': replica_uri, **engine_options(config, replica_uri)}}
+
+
+def sqlite_pragmas(config):
+    """Return the PRAGMA statements run on every new SQLite connection"""
+    return [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA busy_timeout={config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA mmap_size={config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA cache_size={-config['SQLITE_CACHE_SIZE_KB']}",  # Negative means KiB, not pages
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA foreign_keys=ON'
+    ]
+
+
+def configure_engine(engine, config):
+    """Install the connect-time settings for the engine's database"""
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica inside @use_replica views"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, 'is_dml', False)
+            and has_app_context()
+            and g.get('use_replica')
+            and REPLICA_BIND in self._db.engines
+        ):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def use_replica(view):
+    """Route a view's reads to the read replica, when one is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
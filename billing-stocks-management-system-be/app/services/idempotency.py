@@ -0,0 +1,115 @@
+from flask import current_app, g, request, jsonify
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import IdempotencyKey
+from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import json
+import time
+
+# Expired keys are purged at most once per interval per worker
+EVICTION_INTERVAL_SECONDS = 60
+_last_eviction = 0.0
+
+
+def _request_hash():
+    """Fingerprint the request body so a reused key with a different payload is rejected"""
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+
+def _find_stored(key):
+    """Look up the stored response for a key on the current endpoint (one indexed lookup)"""
+    stored = IdempotencyKey.query.filter_by(key=key, endpoint=request.endpoint).first()
+    now = datetime.utcnow()
+    if stored and stored.expires_at <= now:
+        # Expired: forget it in a short transaction of its own so the key can be reused.
+        # A delete pending in the request's session would hold SQLite's write lock
+        # while the view reserves invoice numbers on another connection.
+        table = IdempotencyKey.__table__
+        with db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.id == stored.id, table.c.expires_at <= now))
+        db.session.expunge(stored)
+        return None
+    return stored
+
+
+def _replay(stored, request_hash):
+    """Return the original response for a retried request"""
+    if stored.request_hash != request_hash:
+        return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+
+    response = current_app.response_class(
+        stored.response_body,
+        status=stored.status_code,
+        mimetype='application/json'
+    )
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Replay the stored response when a request repeats an Idempotency-Key header"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        request_hash = _request_hash()
+        stored = _find_stored(key)
+        if stored:
+            return _replay(stored, request_hash)
+
+        g.idempotency = (key, request_hash)
+        try:
+            return view(*args, **kwargs)
+        except IntegrityError:
+            # A concurrent retry with the same key committed first
+            db.session.rollback()
+            response = replay_stored_response()
+            if response is None:
+                raise
+            return response
+
+    return wrapper
+
+
+def replay_stored_response():
+    """Return the stored response for the current key, if another request saved one"""
+    if 'idempotency' not in g:
+        return None
+    key, request_hash = g.idempotency
+    stored = IdempotencyKey.query.filter_by(key=key, endpoint=request.endpoint).first()
+    return _replay(stored, request_hash) if stored else None
+
+
+def remember_response(body, status_code):
+    """Store a response for the current Idempotency-Key in the caller's transaction.
+
+    Call this right before committing, so the response is saved if and only if
+    the change it describes is.
+    """
+    global _last_eviction
+
+    if 'idempotency' not in g:
+        return
+    key, request_hash = g.idempotency
+    now = datetime.utcnow()
+
+    # TTL-based eviction, piggybacking on a transaction that is writing anyway
+    if time.monotonic() - _last_eviction > EVICTION_INTERVAL_SECONDS:
+        _last_eviction = time.monotonic()
+        IdempotencyKey.query.filter(IdempotencyKey.expires_at <= now).delete(synchronize_session=False)
+
+    db.session.add(IdempotencyKey(
+        key=key,
+        endpoint=request.endpoint,
+        request_hash=request_hash,
+        status_code=status_code,
+        response_body=json.dumps(body),
+        expires_at=now + timedelta(hours=current_app.config['IDEMPOTENCY_KEY_TTL_HOURS'])
+    ))
@@ -0,0 +1,114 @@
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import InvoiceSequence
+from datetime import date
+import heapq
+import threading
+
+# Invoice numbers are allocated per (prefix, financial year) from blocks reserved
+# in the invoice_sequences table. Every reservation is committed on its own
+# connection before any number from it is used, so a number can never be handed
+# out twice, even after a restart. A worker that exits with part of a block left
+# skips those numbers; set INVOICE_NUMBER_BLOCK_SIZE=1 for strictly consecutive
+# numbering at the cost of one reservation per bill.
+#
+# A number is taken before the bill's stock is decremented: on SQLite that
+# UPDATE holds the write lock, so a block could not be reserved after it. A bill
+# rejected after taking a number hands it back with release_invoice_number(),
+# and the worker's next bill in that financial year reuses it.
+#
+# The blocks and released numbers describe the database they were reserved in:
+# restoring a backup must call reset_invoice_numbers(), or numbers left over
+# from before the restore collide with the restored sequence.
+
+_lock = threading.Lock()  # Guards _blocks and _released; never held across a database round-trip
+_blocks = {}  # (prefix, financial_year) -> [next_value, end_value)
+_released = {}  # (prefix, financial_year) -> heap of numbers handed back by rejected bills
+_reserving = {}  # (prefix, financial_year) -> lock held by the thread reserving its next block
+
+
+def financial_year(on_date):
+    """Return the Indian financial year (April to March) containing a date, e.g. '2025-26'"""
+    start_year = on_date.year if on_date.month >= 4 else on_date.year - 1
+    return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+
+def format_invoice_number(prefix, year, number):
+    """Format an invoice number, e.g. INV-2526-000042 (GST allows at most 16 characters)"""
+    start_year, end_year = year.split('-')
+    return f"{prefix}-{start_year[-2:]}{end_year}-{number:06d}"
+
+
+def _reserve_block(prefix, year, size):
+    """Reserve `size` numbers in the database and return the first one"""
+    table = InvoiceSequence.__table__
+    match = (table.c.prefix == prefix) & (table.c.financial_year == year)
+
+    with db.engine.begin() as connection:
+        # Make sure the sequence row exists without racing other workers
+        values = {'prefix': prefix, 'financial_year': year, 'next_value': 1}
+        if connection.dialect.name == 'postgresql':
+            connection.execute(postgresql.insert(table).values(**values).on_conflict_do_nothing())
+        elif connection.dialect.name == 'sqlite':
+            connection.execute(sqlite.insert(table).values(**values).on_conflict_do_nothing())
+        elif connection.execute(select(table.c.id).where(match)).first() is None:
+            connection.execute(table.insert().values(**values))
+
+        connection.execute(update(table).where(match).values(next_value=table.c.next_value + size))
+        next_value = connection.execute(select(table.c.next_value).where(match)).scalar_one()
+
+    return next_value - size
+
+
+def _take_number(key):
+    """Return a released or reserved number for a (prefix, year), or None; call with _lock held"""
+    released = _released.get(key)
+    if released:
+        return heapq.heappop(released)
+    block = _blocks.get(key)
+    if block is None or block[0] >= block[1]:
+        return None
+    block[0] += 1
+    return block[0] - 1
+
+
+def next_invoice_number(prefix='INV', on_date=None):
+    """Allocate the next invoice number for a prefix in the financial year of `on_date`"""
+    year = financial_year(on_date or date.today())
+    key = (prefix, year)
+
+    while True:
+        with _lock:
+            number = _take_number(key)
+            if number is not None:
+                return format_invoice_number(prefix, year, number)
+            reserving = _reserving.setdefault(key, threading.Lock())
+
+        # One thread per (prefix, year) reserves the next block; the others wait for it
+        with reserving:
+            with _lock:
+                block = _blocks.get(key)
+                if block is not None and block[0] < block[1]:
+                    continue
+            size = current_app.config['INVOICE_NUMBER_BLOCK_SIZE']
+            start = _reserve_block(prefix, year, size)
+            with _lock:
+                _blocks[key] = [start, start + size]
+
+
+def release_invoice_number(invoice_number, prefix='INV', on_date=None):
+    """Hand back a number allocated to a bill that was not saved, so the next bill uses it"""
+    year = financial_year(on_date or date.today())
+    number = int(invoice_number.rsplit('-', 1)[1])
+
+    with _lock:
+        heapq.heappush(_released.setdefault((prefix, year), []), number)
+
+
+def reset_invoice_numbers():
+    """Forget reserved blocks and released numbers, e.g. after the database was restored"""
+    with _lock:
+        _blocks.clear()
+        _released.clear()
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Cart pricing engine. A whole cart is priced in one vectorized NumPy pass using
+# integer paise, so totals are exact and do not drift with float noise however
+# many lines a wholesale order has. GST rates are carried in basis points
+# (18% -> 1800) so fractional slabs such as 0.25% stay integral as well.
+
+
+# GST rates in force, in percent. Includes the slabs retired in 2025 (12, 28),
+# since bills from before the change still carry them.
+GST_SLABS = np.array([0, 0.1, 0.25, 1.5, 3, 5, 12, 18, 28, 40])
+
+
+def to_paise(amounts):
+    """Convert rupee amounts (scalar or sequence) to integer paise"""
+    return np.rint(np.asarray(amounts, dtype=np.float64) * 100).astype(np.int64)
+
+
+def to_rupees(paise):
+    """Convert integer paise (scalar or array) back to rupees"""
+    if isinstance(paise, np.ndarray):
+        return paise / 100
+    return int(paise) / 100
+
+
+def _round_div(numerator, denominator):
+    """Integer division rounding half away from zero"""
+    return np.sign(numerator) * ((np.abs(numerator) + denominator // 2) // denominator)
+
+
+class CartPrice:
+    """Per-line and total amounts for a priced cart, all in integer paise"""
+
+    def __init__(self, taxable, cgst, sgst, igst, bill_discount, interstate):
+        self.taxable = taxable
+        self.cgst = cgst
+        self.sgst = sgst
+        self.igst = igst
+        self.gst = cgst + sgst + igst
+        self.line_total = taxable + self.gst
+        self.bill_discount = int(bill_discount)
+        self.interstate = interstate
+
+        self.subtotal = int(taxable.sum())
+        self.total_cgst = int(cgst.sum())
+        self.total_sgst = int(sgst.sum())
+        self.total_igst = int(igst.sum())
+        self.total_gst = self.total_cgst + self.total_sgst + self.total_igst
+        self.total = self.subtotal + self.total_gst - self.bill_discount
+
+    def summary(self):
+        """Return the bill totals in rupees"""
+        return {
+            'subtotal': to_rupees(self.subtotal),
+            'discount': to_rupees(self.bill_discount),
+            'cgst_amount': to_rupees(self.total_cgst),
+            'sgst_amount': to_rupees(self.total_sgst),
+            'igst_amount': to_rupees(self.total_igst),
+            'gst_amount': to_rupees(self.total_gst),
+            'total_amount': to_rupees(self.total),
+            'interstate': self.interstate
+        }
+
+
+def price_cart(unit_prices, quantities, discounts, gst_percentages, bill_discount=0, interstate=False):
+    """Price a whole cart in one vectorized pass.
+
+    ``discounts`` are per unit, as in the billing API. Intra-state supplies are
+    split evenly into CGST and SGST (each rounded to the paisa on half the rate);
+    inter-state supplies carry the full rate as IGST.
+    """
+    unit_paise = to_paise(unit_prices)
+    discount_paise = to_paise(discounts)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    if not np.array_equal(quantities, np.trunc(quantities)):
+        raise ValueError('Quantities must be whole numbers')
+    quantities = quantities.astype(np.int64)
+    rate_bp = np.rint(np.asarray(gst_percentages, dtype=np.float64) * 100).astype(np.int64)
+
+    taxable = (unit_paise - discount_paise) * quantities
+    zero = np.zeros_like(taxable)
+
+    if interstate:
+        igst = _round_div(taxable * rate_bp, 10000)
+        cgst = sgst = zero
+    else:
+        cgst = _round_div(taxable * rate_bp, 20000)
+        sgst = cgst.copy()
+        igst = zero
+
+    return CartPrice(taxable, cgst, sgst, igst, to_paise(bill_discount), bool(interstate))
+
+
+def gst_on(taxable_amount, gst_percentage, interstate=False):
+    """Return the GST in rupees on one taxable amount, rounded as price_cart rounds a line"""
+    taxable = int(to_paise(taxable_amount))
+    rate_bp = int(round(gst_percentage * 100))
+    if interstate:
+        return to_rupees(_round_div(taxable * rate_bp, 10000))
+    return to_rupees(2 * _round_div(taxable * rate_bp, 20000))
+
+
+def infer_gst_rates(taxable_amounts, gst_amounts):
+    """Infer each line's GST rate from its taxable and GST amounts, in one vectorized pass.
+
+    The ratio is snapped to the nearest slab when it lies within the error a
+    paisa of rounding can cause on that line (so 17.99% and 18.01% both read as
+    18%); otherwise it is kept, rounded to two places, so a genuine odd rate
+    still shows up. Lines with nothing taxable get 0.
+    """
+    taxable = np.asarray(taxable_amounts, dtype=np.float64)
+    gst = np.asarray(gst_amounts, dtype=np.float64)
+    ratio = np.divide(gst * 100, taxable, out=np.zeros_like(gst), where=taxable > 0)
+
+    nearest = GST_SLABS[np.abs(ratio[:, None] - GST_SLABS[None, :]).argmin(axis=1)]
+    # CGST and SGST are each rounded to the paisa, so allow two paise of error
+    tolerance = np.divide(2.0, taxable, out=np.zeros_like(taxable), where=taxable > 0) + 0.01
+    return np.where(np.abs(ratio - nearest) <= tolerance, nearest, np.round(ratio, 2))
@@ -0,0 +1,299 @@
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models import Product
+from app.services.catalog import catalog_entries
+from collections import defaultdict
+import heapq
+from datetime import datetime
+import re
+import threading
+import time
+
+# In-memory fuzzy matcher that resolves free text from voice billing and bill
+# scans ("two maggi noodles", "Surf Exel 1kg") to ranked product candidates.
+#
+# The index is built over the vocabulary of words in product names rather than
+# over the products themselves: each word is indexed by its trigrams and its
+# Soundex code, and maps to the products whose names contain it. A query word
+# is matched to similar vocabulary words (trigram Dice similarity, or the same
+# Soundex code for misspellings that sound alike), and products are scored by
+# how well their words cover the query. Write paths call refresh_matcher() after
+# committing; changes made by other workers are picked up from updated_at at
+# most CATALOG_CACHE_TTL_SECONDS later, and products they deleted are dropped
+# when the index holds more products than the table.
+
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12, 'dozen': 12
+}
+FILLER_WORDS = {'of', 'and', 'x', 'pcs', 'pc', 'piece', 'pieces', 'nos', 'no', 'packet', 'packets', 'pack', 'packs'}
+MIN_SIMILARITY = 0.5
+DEFAULT_CANDIDATES = 5  # Candidates returned per phrase when no limit is given
+PHONETIC_SIMILARITY = 0.75  # Credit for a word that only matches by sound
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6'
+}
+
+
+def soundex(word):
+    """Return the Soundex code of a word (e.g. 'excel' and 'exel' -> 'e240')"""
+    letters = [letter for letter in word.lower() if letter.isalpha()]
+    if not letters:
+        return None
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0])
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter)
+        if digit and digit != previous:
+            code += digit
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def trigrams(word):
+    """Return the set of trigrams of a word, padded so short words have some"""
+    padded = f'  {word} '
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def words(text):
+    """Split text into lower-case words"""
+    return re.findall(r'\w+', text.lower())
+
+
+def parse_phrase(phrase):
+    """Split a spoken or scanned phrase into (quantity, search words)"""
+    quantity = None
+    terms = []
+    for word in words(phrase):
+        if quantity is None and not terms and (word.isdigit() or word in NUMBER_WORDS):
+            quantity = int(word) if word.isdigit() else NUMBER_WORDS[word]
+        elif word not in FILLER_WORDS:
+            terms.append(word)
+    return quantity or 1, terms
+
+
+_PHRASE_SEPARATOR = re.compile(
+    r'[\n,;]+|\band\b(?=\s+(?:\d|' + '|'.join(sorted(NUMBER_WORDS, key=len, reverse=True)) + r')\b)',
+    re.IGNORECASE
+)
+
+
+def split_phrases(text):
+    """Split free text into one phrase per item: lines, commas, and 'and' before a quantity"""
+    return [phrase.strip() for phrase in _PHRASE_SEPARATOR.split(text) if phrase.strip()]
+
+
+class _ProductMatcher:
+    """Word-level trigram and Soundex index over product names"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names = {}  # product_id -> name
+        self._product_words = {}  # product_id -> set of words in its name
+        self._postings = defaultdict(set)  # word -> product IDs
+        self._trigrams = defaultdict(set)  # trigram -> words
+        self._phonetic = defaultdict(set)  # Soundex code -> words
+        self._loaded = False
+        self._synced_at = None  # Wall-clock time of the last load from the database
+        self._checked_at = 0.0
+
+    def _add(self, product_id, name):
+        """Index one product (caller holds the lock)"""
+        self._remove(product_id)
+        product_words = set(words(name or ''))
+        self._names[product_id] = name
+        self._product_words[product_id] = product_words
+        for word in product_words:
+            if word not in self._postings:
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].add(word)
+                code = soundex(word)
+                if code:
+                    self._phonetic[code].add(word)
+            self._postings[word].add(product_id)
+
+    def _remove(self, product_id):
+        """Drop one product, and any word only it used, from the index (caller holds the lock)"""
+        self._names.pop(product_id, None)
+        for word in self._product_words.pop(product_id, ()):
+            postings = self._postings[word]
+            postings.discard(product_id)
+            if postings:
+                continue
+            del self._postings[word]
+            for trigram in trigrams(word):
+                self._trigrams[trigram].discard(word)
+                if not self._trigrams[trigram]:
+                    del self._trigrams[trigram]
+            code = soundex(word)
+            if code:
+                self._phonetic[code].discard(word)
+                if not self._phonetic[code]:
+                    del self._phonetic[code]
+
+    def _sync(self):
+        """Load the index on first use, then pick up products changed by other workers"""
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < current_app.config['CATALOG_CACHE_TTL_SECONDS']:
+            return
+
+        synced_at = datetime.utcnow()
+        query = db.session.query(Product.id, Product.name)
+        if self._loaded:
+            query = query.filter(Product.updated_at >= self._synced_at)
+        rows = query.all()
+
+        with self._lock:
+            for product_id, name in rows:
+                self._add(product_id, name)
+            indexed = len(self._names)
+
+        # Every product is indexed now, so any surplus was deleted by another worker
+        existing_ids = None
+        if self._loaded and indexed > db.session.query(func.count(Product.id)).scalar():
+            existing_ids = {product_id for product_id, in db.session.query(Product.id)}
+
+        with self._lock:
+            if existing_ids is not None:
+                for product_id in set(self._names) - existing_ids:
+                    self._remove(product_id)
+            self._loaded = True
+            self._synced_at = synced_at
+            self._checked_at = now
+
+    def refresh(self, product_ids):
+        """Re-index the given products from the database; missing ones are dropped"""
+        if not self._loaded:
+            return
+        rows = dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(set(product_ids))).all())
+        with self._lock:
+            for product_id in product_ids:
+                if product_id in rows:
+                    self._add(product_id, rows[product_id])
+                else:
+                    self._remove(product_id)
+
+    def reset(self):
+        """Forget the whole index; it is loaded again from the database on the next match"""
+        with self._lock:
+            self._names.clear()
+            self._product_words.clear()
+            self._postings.clear()
+            self._trigrams.clear()
+            self._phonetic.clear()
+            self._loaded = False
+            self._synced_at = None
+
+    def _similar_words(self, term):
+        """Return {vocabulary word: similarity} for the words close to a query word"""
+        if term in self._postings:
+            return {term: 1.0}
+
+        term_trigrams = trigrams(term)
+        shared = defaultdict(int)
+        for trigram in term_trigrams:
+            for word in self._trigrams.get(trigram, ()):
+                shared[word] += 1
+
+        similar = {}
+        for word, count in shared.items():
+            # Dice coefficient; a word has len(word) + 1 padded trigrams
+            similarity = 2 * count / (len(term_trigrams) + len(word) + 1)
+            if similarity >= MIN_SIMILARITY:
+                similar[word] = similarity
+        for word in self._phonetic.get(soundex(term), ()):
+            similar[word] = max(similar.get(word, 0), PHONETIC_SIMILARITY)
+        return similar
+
+    def _candidates(self, term_products, limit):
+        """Products matching every query word, else all but one, else any (set operations only)"""
+        term_products = [products for products in term_products if products]
+        if not term_products:
+            return set()
+
+        candidates = set.intersection(*term_products)
+        if len(candidates) < limit and len(term_products) > 2:
+            for index in range(len(term_products)):
+                candidates |= set.intersection(*(term_products[:index] + term_products[index + 1:]))
+        if len(candidates) < limit:
+            candidates = set.union(*term_products)
+        return candidates
+
+    def match(self, terms, limit):
+        """Return up to `limit` (product_id, name, score) candidates for the query words"""
+        self._sync()
+        if not terms:
+            return []
+
+        with self._lock:
+            similar = [self._similar_words(term) for term in terms]
+            term_products = [set().union(*(self._postings[word] for word in close)) for close in similar]
+
+            # Score each candidate by the best similarity its words reach for each query word
+            scored = []
+            for product_id in self._candidates(term_products, limit):
+                product_words = self._product_words[product_id]
+                score = 0.0
+                matched = 0
+                for close in similar:
+                    best = max((close.get(word, 0) for word in product_words), default=0)
+                    if best:
+                        score += best
+                        matched += 1
+                # Rank by how much of the query is covered, then prefer names without extra words
+                scored.append((-score, -matched / len(product_words), product_id))
+
+            return [
+                (product_id, self._names[product_id], round(-score / len(terms), 3))
+                for score, _, product_id in heapq.nsmallest(limit, scored)
+            ]
+
+
+_matcher = _ProductMatcher()
+
+
+def match_products(phrase, limit):
+    """Resolve one phrase to (quantity, [(product_id, name, score), ...]), best first"""
+    quantity, terms = parse_phrase(phrase)
+    return quantity, _matcher.match(terms, limit)
+
+
+def match_text(text, limit=DEFAULT_CANDIDATES):
+    """Resolve free text to one entry per item with its quantity and ranked candidates.
+
+    Candidates are checked against the catalog, which also supplies their
+    current prices, so a product deleted since it was indexed is never returned.
+    """
+    phrases = []
+    for phrase in split_phrases(text):
+        quantity, candidates = match_products(phrase, limit)
+        phrases.append((phrase, quantity, candidates))
+
+    entries = catalog_entries({product_id for _, _, candidates in phrases for product_id, _, _ in candidates})
+
+    return [{
+        'phrase': phrase,
+        'quantity': quantity,
+        'candidates': [{
+            'product_id': product_id,
+            'name': entries[product_id].name,
+            'selling_price': entries[product_id].selling_price,
+            'gst_percentage': entries[product_id].gst_percentage,
+            'score': score
+        } for product_id, _, score in candidates if product_id in entries]
+    } for phrase, quantity, candidates in phrases]
+
+
+def refresh_matcher(product_ids):
+    """Re-index products after committing changes to them"""
+    _matcher.refresh(product_ids)
+
+
+def reset_matcher():
+    """Drop the whole index after the products table was replaced, e.g. by a restore"""
+    _matcher.reset()
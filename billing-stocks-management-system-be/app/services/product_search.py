@@ -0,0 +1,81 @@
+from flask import current_app
+from sqlalchemy import select, text
+from app import db
+from app.models import Product
+import re
+
+# Full-text product search. On SQLite the products_fts FTS5 table indexes name,
+# description, SKU and barcode, kept in sync by triggers on the products table;
+# on PostgreSQL a generated, GIN-indexed tsvector column does the same job (both
+# are created by migration 0002). Any other database falls back to substring
+# matching on the name. Every word the
+# user types is matched as a prefix, so partial words work for typeahead.
+#
+# Ranking every match of a one- or two-letter prefix would dominate the cost of a
+# keystroke, so only the first PRODUCT_SEARCH_CANDIDATES matches are ranked. Once
+# the query narrows below that, the ranking is exact.
+
+# bm25() weights for name, description, sku and barcode
+_SQLITE_SEARCH = text("""
+    SELECT id FROM (
+        SELECT rowid AS id, bm25(products_fts, 10.0, 1.0, 5.0, 5.0) AS score
+        FROM products_fts
+        WHERE products_fts MATCH :query
+        LIMIT :candidates
+    )
+    ORDER BY score
+    LIMIT :limit
+""")
+
+_POSTGRES_SEARCH = text("""
+    SELECT id FROM (
+        SELECT id, ts_rank(search_vector, query) AS score
+        FROM products, to_tsquery('simple', :query) AS query
+        WHERE search_vector @@ query
+        LIMIT :candidates
+    ) AS candidates
+    ORDER BY score DESC, id
+    LIMIT :limit
+""")
+
+_RESULT_COLUMNS = [
+    Product.id, Product.name, Product.sku, Product.barcode, Product.selling_price,
+    Product.gst_percentage, Product.stock_quantity
+]
+
+
+def search_terms(query):
+    """Split a search string into lower-case words"""
+    return re.findall(r'\w+', query.lower())
+
+
+def search_products(query, limit):
+    """Return up to `limit` products matching every word of `query`, best first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    dialect = db.engine.dialect.name
+    params = {'limit': limit, 'candidates': max(limit, current_app.config['PRODUCT_SEARCH_CANDIDATES'])}
+    if dialect == 'sqlite':
+        params['query'] = ' '.join(f'"{term}"*' for term in terms)
+        ids = db.session.execute(_SQLITE_SEARCH, params).scalars().all()
+    elif dialect == 'postgresql':
+        params['query'] = ' & '.join(f'{term}:*' for term in terms)
+        ids = db.session.execute(_POSTGRES_SEARCH, params).scalars().all()
+    else:
+        rows = db.session.execute(
+            select(*_RESULT_COLUMNS)
+            .where(*(Product.name.icontains(term, autoescape=True) for term in terms))
+            .order_by(Product.name)
+            .limit(limit)
+        ).all()
+        return rows
+
+    if not ids:
+        return []
+
+    # Fetch the matched rows by primary key and restore the ranking order
+    rows = db.session.execute(select(*_RESULT_COLUMNS).where(Product.id.in_(ids))).all()
+    rank = {product_id: position for position, product_id in enumerate(ids)}
+    return sorted(rows, key=lambda row: rank[row.id])
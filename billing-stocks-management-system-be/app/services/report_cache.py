@@ -0,0 +1,173 @@
+from flask import current_app, g, request, jsonify
+from collections import OrderedDict, namedtuple
+from datetime import date
+from sqlalchemy import func, select
+from app import db
+from app.models import DailySalesRollup, DailyPurchaseRollup
+import threading
+import time
+
+# In-process cache of JSON report results, so dashboards reloading the same
+# reports every few minutes do not recompute them. Entries are keyed by the
+# endpoint and its parameters (with the date range resolved, so "last 30 days"
+# is keyed by its actual dates), and the least recently used entry is evicted
+# once REPORT_CACHE_SIZE reports are cached.
+#
+# Every entry records the data it was computed from (sales, purchases, products,
+# customers) and its date range. Write paths call invalidate_reports() after
+# committing, which drops only the entries of that kind whose range covers the
+# dates written; reports without a date range (inventory) are dropped by any
+# write they depend on.
+#
+# Other worker processes cannot call invalidate_reports() here. Every bill also
+# updates its day's rollup row, so an entry built from sales or purchases keeps
+# the rollup version of its range (latest updated_at and bill count) read before
+# it was computed, and is recomputed once that version changes. Product and
+# customer edits leave no such trace: entries for periods still open (ending
+# today or later) expire after REPORT_CACHE_TTL_SECONDS, and closed periods after
+# REPORT_CACHE_CLOSED_TTL_SECONDS.
+
+SALES = 'sales'
+PURCHASES = 'purchases'
+PRODUCTS = 'products'
+CUSTOMERS = 'customers'
+
+ROLLUPS = {SALES: DailySalesRollup, PURCHASES: DailyPurchaseRollup}
+
+CachedReport = namedtuple('CachedReport', ['body', 'sources', 'start_date', 'end_date', 'cached_at', 'version'])
+
+
+def rollup_version(sources, start_date=None, end_date=None):
+    """Return the latest update and bill count of the rollup rows a report reads, or None"""
+    versions = []
+    for source in sorted(set(sources) & set(ROLLUPS)):
+        model = ROLLUPS[source]
+        for column in (func.max(model.updated_at), func.sum(model.bill_count)):
+            query = select(column)
+            if start_date is not None:
+                query = query.where(model.rollup_date >= start_date)
+            if end_date is not None:
+                query = query.where(model.rollup_date <= end_date)
+            versions.append(query.scalar_subquery())
+    if not versions:
+        return None
+    return tuple(db.session.execute(select(*versions)).one())
+
+
+class _ReportCache:
+    """Bounded LRU map of (endpoint, params) to a report's JSON body"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> CachedReport
+        self._generation = 0  # Bumped on every invalidation so a report racing a write is discarded
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, entry, now, version):
+        """Return whether an entry's rollups changed or it outlived its TTL (open or closed period)"""
+        if entry.version != version:
+            return True
+        config = current_app.config
+        if entry.end_date is not None and entry.end_date < date.today():
+            ttl = config['REPORT_CACHE_CLOSED_TTL_SECONDS']
+            return bool(ttl) and now - entry.cached_at >= ttl
+        return now - entry.cached_at >= config['REPORT_CACHE_TTL_SECONDS']
+
+    def get(self, key, version=None):
+        """Return (cached body or None, generation to store a freshly computed body with)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now, version):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, self._generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body, self._generation
+
+    def put(self, key, entry, generation):
+        """Cache a computed report unless a write was invalidated while it was computed"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > current_app.config['REPORT_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, source=None, dates=None):
+        """Drop entries computed from a source whose range covers any of the dates"""
+        with self._lock:
+            self._generation += 1
+            if source is None:
+                self._entries.clear()
+                return
+            for key, entry in list(self._entries.items()):
+                if source not in entry.sources:
+                    continue
+                if dates is None or entry.start_date is None or any(
+                    entry.start_date <= day <= entry.end_date for day in dates
+                ):
+                    del self._entries[key]
+
+    def stats(self):
+        """Return the cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': current_app.config['REPORT_CACHE_SIZE'],
+                'ttl_seconds': current_app.config['REPORT_CACHE_TTL_SECONDS'],
+                'closed_ttl_seconds': current_app.config['REPORT_CACHE_CLOSED_TTL_SECONDS'] or None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+_cache = _ReportCache()
+
+
+def cached_report(sources, start_date=None, end_date=None, **params):
+    """Return the cached JSON response for the current report, or None after noting what to cache.
+
+    Only JSON reports are cached; exports are always generated. Call
+    remember_report() with the body once it has been computed.
+    """
+    if request.args.get('format', 'json') != 'json':
+        return None
+    key = (request.endpoint, start_date, end_date, tuple(sorted(params.items())))
+    # Read before computing: a bill committed meanwhile makes the stored version stale
+    version = rollup_version(sources, start_date, end_date)
+    body, generation = _cache.get(key, version)
+    if body is not None:
+        return jsonify(body), 200
+    g.report_cache = (key, frozenset(sources), start_date, end_date, generation, version)
+    return None
+
+
+def remember_report(body):
+    """Cache a computed report body for the key noted by cached_report()"""
+    if 'report_cache' not in g:
+        return
+    key, sources, start_date, end_date, generation, version = g.report_cache
+    _cache.put(key, CachedReport(body, sources, start_date, end_date, time.monotonic(), version), generation)
+
+
+def invalidate_reports(source=None, dates=None):
+    """Drop cached reports computed from changed data after committing.
+
+    source is SALES, PURCHASES, PRODUCTS or CUSTOMERS, and dates the bill dates
+    written; no dates drops every report using that source, and no source drops
+    everything.
+    """
+    _cache.invalidate(source, None if dates is None else set(dates))
+
+
+def report_cache_stats():
+    """Return the report cache size and hit/miss counters"""
+    return _cache.stats()
@@ -0,0 +1,178 @@
+from sqlalchemy import BigInteger, bindparam, case, cast, func, insert, literal, select, text
+from app import db
+from app.models import DailySalesRollup, DailyPurchaseRollup, Purchase, PurchaseItem, Sale
+from app.services.pricing import to_paise
+from datetime import datetime
+
+# Per-day sales and purchase totals for the reports. Every bill adds itself to
+# its day's row in the same transaction that saves it, so a report over any
+# range reads at most one row per day instead of scanning every bill. The rows
+# are plain sums: rebuild_rollups() recomputes them from the bills, e.g. after
+# a backfill or an import that bypassed the API. Amounts are kept in integer
+# paise, each bill rounded to the paisa before it is added, like the pricing
+# engine, so a row updated once per bill never drifts from the bills' sum.
+#
+# Concurrent bills on the same day update the same row, so it is written last,
+# just before commit, to keep the row lock short.
+
+SALE_PAYMENT_METHODS = ('cash', 'credit', 'upi', 'card')
+PURCHASE_PAYMENT_METHODS = ('cash', 'credit', 'upi', 'bank_transfer')
+
+SALE_TOTALS = ['bill_count', 'subtotal', 'discount', 'gst_amount', 'total_amount'] + [
+    f'{method}_amount' for method in SALE_PAYMENT_METHODS + ('other',)
+]
+PURCHASE_TOTALS = ['bill_count', 'gst_amount', 'total_amount'] + [
+    f'{method}_amount' for method in PURCHASE_PAYMENT_METHODS + ('other',)
+]
+
+
+def _paise(amount):
+    """Return a bill amount in rupees as integer paise"""
+    return int(to_paise(amount or 0))
+
+
+def _paise_sql(column):
+    """SQL expression for a rupee column as integer paise, rounded per row like _paise()"""
+    return cast(func.round(column * 100), BigInteger)
+
+
+def _payment_column(method, methods):
+    """Return the rollup column a payment method's amount is added to"""
+    return f'{method}_amount' if method in methods else 'other_amount'
+
+
+def _upsert_statement(table, columns):
+    """Return an INSERT that adds to the day's row if it exists (same syntax on SQLite and PostgreSQL)"""
+    names = ['rollup_date', 'updated_at'] + columns
+    return text(
+        f"INSERT INTO {table.name} ({', '.join(names)}) "
+        f"VALUES ({', '.join(':' + name for name in names)}) "
+        f"ON CONFLICT (rollup_date) DO UPDATE SET updated_at = excluded.updated_at, "
+        + ', '.join(f'{column} = {table.name}.{column} + excluded.{column}' for column in columns)
+    ).bindparams(*(bindparam(name, type_=table.c[name].type) for name in names))
+
+
+# Built once: SQLAlchemy cannot cache the compiled form of its own ON CONFLICT constructs
+SALES_UPSERT = _upsert_statement(DailySalesRollup.__table__, SALE_TOTALS)
+PURCHASES_UPSERT = _upsert_statement(DailyPurchaseRollup.__table__, PURCHASE_TOTALS)
+
+
+def _add_to_rollup(model, upsert, totals, columns):
+    """Add {date: {column: amount}} to the rollup, creating missing days"""
+    if not totals:
+        return
+    table = model.__table__
+    now = datetime.utcnow()
+    # Sorted so concurrent transactions lock the day rows in the same order
+    rows = [{'rollup_date': day, 'updated_at': now, **totals[day]} for day in sorted(totals)]
+
+    if db.engine.dialect.name in ('postgresql', 'sqlite'):
+        db.session.execute(upsert, rows)
+        return
+
+    for row in rows:
+        updated = db.session.execute(
+            table.update().where(table.c.rollup_date == row['rollup_date']).values(
+                updated_at=now, **{column: table.c[column] + row[column] for column in columns}
+            )
+        ).rowcount
+        if not updated:
+            db.session.execute(table.insert().values(**row))
+
+
+def record_sales(sales):
+    """Add flushed sales to the daily rollup in the caller's transaction"""
+    totals = {}
+    for sale in sales:
+        day = totals.setdefault(sale.sale_date, dict.fromkeys(SALE_TOTALS, 0))
+        day['bill_count'] += 1
+        day['subtotal'] += _paise(sale.subtotal)
+        day['discount'] += _paise(sale.discount)
+        day['gst_amount'] += _paise(sale.gst_amount)
+        day['total_amount'] += _paise(sale.total_amount)
+        day[_payment_column(sale.payment_method, SALE_PAYMENT_METHODS)] += _paise(sale.total_amount)
+    _add_to_rollup(DailySalesRollup, SALES_UPSERT, totals, SALE_TOTALS)
+
+
+def record_purchases(purchases):
+    """Add flushed purchases (with their items) to the daily rollup in the caller's transaction"""
+    purchases = list(purchases)
+    if not purchases:
+        return
+    gst = dict(db.session.execute(
+        select(PurchaseItem.purchase_id, func.sum(_paise_sql(PurchaseItem.gst_amount)))
+        .where(PurchaseItem.purchase_id.in_([purchase.id for purchase in purchases]))
+        .group_by(PurchaseItem.purchase_id)
+    ).all())
+
+    totals = {}
+    for purchase in purchases:
+        day = totals.setdefault(purchase.purchase_date, dict.fromkeys(PURCHASE_TOTALS, 0))
+        day['bill_count'] += 1
+        day['gst_amount'] += int(gst.get(purchase.id) or 0)
+        day['total_amount'] += _paise(purchase.total_amount)
+        day[_payment_column(purchase.payment_method, PURCHASE_PAYMENT_METHODS)] += _paise(purchase.total_amount)
+    _add_to_rollup(DailyPurchaseRollup, PURCHASES_UPSERT, totals, PURCHASE_TOTALS)
+
+
+def _payment_sums(method_column, amount_column, methods):
+    """Return SUM(CASE ...) columns splitting an amount by payment method"""
+    return [
+        func.coalesce(func.sum(case((method_column == method, amount_column), else_=0)), 0)
+        for method in methods
+    ] + [
+        func.coalesce(func.sum(case((method_column.in_(methods), 0), else_=amount_column)), 0)
+    ]
+
+
+def rebuild_rollups(start_date=None, end_date=None):
+    """Recompute the daily rollups from the bills, for every day or a date range.
+
+    Returns the number of sales and purchase days written.
+    """
+    now = datetime.utcnow()
+
+    def in_range(column):
+        conditions = []
+        if start_date:
+            conditions.append(column >= start_date)
+        if end_date:
+            conditions.append(column <= end_date)
+        return conditions
+
+    db.session.execute(DailySalesRollup.__table__.delete().where(*in_range(DailySalesRollup.rollup_date)))
+    db.session.execute(DailyPurchaseRollup.__table__.delete().where(*in_range(DailyPurchaseRollup.rollup_date)))
+
+    sales = db.session.execute(insert(DailySalesRollup).from_select(
+        ['rollup_date', 'updated_at'] + SALE_TOTALS,
+        select(
+            Sale.sale_date,
+            literal(now),
+            func.count(Sale.id),
+            func.coalesce(func.sum(_paise_sql(Sale.subtotal)), 0),
+            func.coalesce(func.sum(_paise_sql(Sale.discount)), 0),
+            func.coalesce(func.sum(_paise_sql(Sale.gst_amount)), 0),
+            func.coalesce(func.sum(_paise_sql(Sale.total_amount)), 0),
+            *_payment_sums(Sale.payment_method, _paise_sql(Sale.total_amount), SALE_PAYMENT_METHODS)
+        ).where(*in_range(Sale.sale_date)).group_by(Sale.sale_date)
+    )).rowcount
+
+    # GST per purchase first, so the purchase header is not counted once per item
+    purchase_gst = select(
+        PurchaseItem.purchase_id, func.sum(_paise_sql(PurchaseItem.gst_amount)).label('gst_amount')
+    ).group_by(PurchaseItem.purchase_id).subquery()
+    purchases = db.session.execute(insert(DailyPurchaseRollup).from_select(
+        ['rollup_date', 'updated_at'] + PURCHASE_TOTALS,
+        select(
+            Purchase.purchase_date,
+            literal(now),
+            func.count(Purchase.id),
+            func.coalesce(func.sum(purchase_gst.c.gst_amount), 0),
+            func.coalesce(func.sum(_paise_sql(Purchase.total_amount)), 0),
+            *_payment_sums(Purchase.payment_method, _paise_sql(Purchase.total_amount), PURCHASE_PAYMENT_METHODS)
+        ).outerjoin(purchase_gst, purchase_gst.c.purchase_id == Purchase.id)
+        .where(*in_range(Purchase.purchase_date)).group_by(Purchase.purchase_date)
+    )).rowcount
+
+    db.session.commit()
+    return sales, purchases
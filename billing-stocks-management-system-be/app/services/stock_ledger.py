@@ -0,0 +1,130 @@
+from sqlalchemy import func, insert, literal, or_, select
+from app import db
+from app.models import Product, Purchase, PurchaseItem, Sale, SaleItem, StockMovement, StockCheckpoint
+from datetime import date, datetime
+
+# Every change to a product's stock appends a row to the stock_movements ledger in
+# the same transaction. products.stock_quantity remains the materialized on-hand
+# quantity, maintained incrementally alongside the ledger. Stock as of a past date
+# is answered from the nearest stock_checkpoints row plus the movements after it.
+
+
+def movement(product_id, quantity, movement_type, movement_date, reference_id=None):
+    """Build a ledger row for record_movements()"""
+    return {
+        'product_id': product_id,
+        'quantity': quantity,
+        'movement_type': movement_type,
+        'reference_id': reference_id,
+        'movement_date': movement_date
+    }
+
+
+def record_movements(movements):
+    """Append movements to the ledger in the caller's transaction"""
+    movements = [row for row in movements if row['quantity']]
+    if not movements:
+        return
+
+    db.session.execute(insert(StockMovement), movements)
+
+    # A backdated movement makes the checkpoints it precedes stale
+    earliest = min(row['movement_date'] for row in movements)
+    if earliest < date.today():
+        StockCheckpoint.query.filter(
+            StockCheckpoint.product_id.in_({row['product_id'] for row in movements}),
+            StockCheckpoint.checkpoint_date >= earliest
+        ).delete(synchronize_session=False)
+
+
+def stock_as_of(as_of, product_ids=None):
+    """Return {product_id: quantity on hand at the end of `as_of`}"""
+    # Nearest checkpoint on or before the date, per product
+    latest = select(
+        StockCheckpoint.product_id,
+        func.max(StockCheckpoint.checkpoint_date).label('checkpoint_date')
+    ).where(StockCheckpoint.checkpoint_date <= as_of).group_by(StockCheckpoint.product_id)
+    if product_ids is not None:
+        latest = latest.where(StockCheckpoint.product_id.in_(product_ids))
+    latest = latest.subquery()
+
+    checkpoints = db.session.execute(
+        select(StockCheckpoint.product_id, StockCheckpoint.quantity).join(
+            latest,
+            (StockCheckpoint.product_id == latest.c.product_id)
+            & (StockCheckpoint.checkpoint_date == latest.c.checkpoint_date)
+        )
+    ).all()
+
+    # Movements after that checkpoint, up to the date
+    movements = select(StockMovement.product_id, func.sum(StockMovement.quantity)).outerjoin(
+        latest, StockMovement.product_id == latest.c.product_id
+    ).where(
+        StockMovement.movement_date <= as_of,
+        or_(latest.c.checkpoint_date.is_(None), StockMovement.movement_date > latest.c.checkpoint_date)
+    ).group_by(StockMovement.product_id)
+    if product_ids is not None:
+        movements = movements.where(StockMovement.product_id.in_(product_ids))
+
+    stock = {product_id: quantity for product_id, quantity in checkpoints}
+    for product_id, quantity in db.session.execute(movements).all():
+        stock[product_id] = stock.get(product_id, 0) + quantity
+
+    if product_ids is not None:
+        for product_id in product_ids:
+            stock.setdefault(product_id, 0)
+    return stock
+
+
+def create_checkpoints(as_of):
+    """Store every product's quantity at the end of `as_of`, a closed (past) day"""
+    if as_of >= date.today():
+        raise ValueError('Checkpoints can only be taken for days that have ended')
+
+    stock = stock_as_of(as_of)
+    StockCheckpoint.query.filter_by(checkpoint_date=as_of).delete(synchronize_session=False)
+    if stock:
+        db.session.execute(insert(StockCheckpoint), [
+            {'product_id': product_id, 'checkpoint_date': as_of, 'quantity': quantity}
+            for product_id, quantity in stock.items()
+        ])
+    db.session.commit()
+    return len(stock)
+
+
+def backfill_ledger():
+    """Populate an empty ledger from existing sales and purchases.
+
+    An 'opening' movement per product makes the ledger add up to the current
+    products.stock_quantity.
+    """
+    if db.session.query(StockMovement.id).first() is not None:
+        raise ValueError('The stock ledger already has movements')
+
+    columns = ['product_id', 'quantity', 'movement_type', 'reference_id', 'movement_date', 'created_at']
+    now = datetime.utcnow()
+
+    db.session.execute(insert(StockMovement).from_select(columns, select(
+        SaleItem.product_id, -SaleItem.quantity, literal('sale'), Sale.id, Sale.sale_date, literal(now)
+    ).join(Sale, SaleItem.sale_id == Sale.id)))
+
+    db.session.execute(insert(StockMovement).from_select(columns, select(
+        PurchaseItem.product_id, PurchaseItem.quantity, literal('purchase'), Purchase.id,
+        Purchase.purchase_date, literal(now)
+    ).join(Purchase, PurchaseItem.purchase_id == Purchase.id)))
+
+    # Balance each product against its current stock, dated before its first movement
+    history = {
+        product_id: (total, first_date) for product_id, total, first_date in db.session.execute(
+            select(StockMovement.product_id, func.sum(StockMovement.quantity), func.min(StockMovement.movement_date))
+            .group_by(StockMovement.product_id)
+        ).all()
+    }
+    openings = []
+    for product_id, stock_quantity, created_at in db.session.query(Product.id, Product.stock_quantity, Product.created_at):
+        total, first_date = history.get(product_id, (0, None))
+        opening_date = min(d for d in (first_date, created_at.date() if created_at else None, date.today()) if d)
+        openings.append(movement(product_id, (stock_quantity or 0) - total, 'opening', opening_date))
+    record_movements(openings)
+
+    db.session.commit()
@@ -0,0 +1,190 @@
+"""Invoice sequences, idempotency keys, stock ledger, customer lookup columns and product search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import re
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+# Full-text product search (see app/services/product_search.py)
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, sku, barcode,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts (rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_update
+    AFTER UPDATE OF name, description, sku, barcode ON products BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, description, sku, barcode)
+        VALUES ('delete', old.id, old.name, old.description, old.sku, old.barcode);
+        INSERT INTO products_fts (rowid, name, description, sku, barcode)
+        VALUES (new.id, new.name, new.description, new.sku, new.barcode);
+    END
+    """,
+    # Index the products that already exist
+    "INSERT INTO products_fts (products_fts) VALUES ('rebuild')"
+]
+
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(sku, '') || ' ' || coalesce(barcode, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)"
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Databases that ran the app before migrations existed may already have some of this
+    existing_tables = set(sa.inspect(bind).get_table_names())
+
+    if 'idempotency_keys' not in existing_tables:
+        op.create_table('idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('endpoint', sa.String(length=100), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=False),
+        sa.Column('response_body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key', 'endpoint', name='uq_idempotency_keys_key_endpoint')
+        )
+        with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_idempotency_keys_expires_at'), ['expires_at'], unique=False)
+
+    if 'invoice_sequences' not in existing_tables:
+        op.create_table('invoice_sequences',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prefix', sa.String(length=10), nullable=False),
+        sa.Column('financial_year', sa.String(length=7), nullable=False),
+        sa.Column('next_value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('prefix', 'financial_year', name='uq_invoice_sequences_prefix_year')
+        )
+
+    if 'stock_checkpoints' not in existing_tables:
+        op.create_table('stock_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('checkpoint_date', sa.Date(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('product_id', 'checkpoint_date', name='uq_stock_checkpoints_product_date')
+        )
+
+    if 'stock_movements' not in existing_tables:
+        op.create_table('stock_movements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('movement_type', sa.String(length=20), nullable=False),
+        sa.Column('reference_id', sa.Integer(), nullable=True),
+        sa.Column('movement_date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+            batch_op.create_index('ix_stock_movements_product_date', ['product_id', 'movement_date'], unique=False)
+
+    # Customer lookup by phone, GSTIN and name prefix
+    customer_columns = {column['name'] for column in sa.inspect(bind).get_columns('customers')}
+    if 'phone_normalized' not in customer_columns:
+        with op.batch_alter_table('customers', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('phone_normalized', sa.String(length=20), nullable=True))
+    op.create_index('ix_customers_gst_number', 'customers', ['gst_number'], unique=False, if_not_exists=True)
+    op.create_index('ix_customers_phone_normalized', 'customers', ['phone_normalized'], unique=False, if_not_exists=True)
+    op.create_index('ix_customers_name_lower', 'customers', [sa.text('lower(name)')], unique=False, if_not_exists=True)
+
+    # Backfill the normalized phone (last 10 digits) and upper-case GSTINs
+    customers = sa.table(
+        'customers',
+        sa.column('id', sa.Integer),
+        sa.column('phone', sa.String),
+        sa.column('phone_normalized', sa.String),
+        sa.column('gst_number', sa.String)
+    )
+    rows = bind.execute(sa.select(customers.c.id, customers.c.phone, customers.c.gst_number)).all()
+    updates = [{
+        'customer_id': customer_id,
+        'phone_normalized': re.sub(r'\D', '', phone or '')[-10:] or None,
+        'gst_number': gst_number.strip().upper() if gst_number else gst_number
+    } for customer_id, phone, gst_number in rows]
+    if updates:
+        bind.execute(
+            customers.update()
+            .where(customers.c.id == sa.bindparam('customer_id'))
+            .values(phone_normalized=sa.bindparam('phone_normalized'), gst_number=sa.bindparam('gst_number')),
+            updates
+        )
+
+    # Full-text product search, maintained by the database itself
+    if bind.dialect.name == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
+    elif bind.dialect.name == 'postgresql':
+        for statement in POSTGRES_SEARCH_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for trigger in ('products_fts_insert', 'products_fts_delete', 'products_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS products_fts')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_products_search_vector')
+        op.execute('ALTER TABLE products DROP COLUMN IF EXISTS search_vector')
+
+    op.drop_index('ix_customers_name_lower', table_name='customers')
+    with op.batch_alter_table('customers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_customers_phone_normalized'))
+        batch_op.drop_index(batch_op.f('ix_customers_gst_number'))
+        batch_op.drop_column('phone_normalized')
+
+    with op.batch_alter_table('stock_movements', schema=None) as batch_op:
+        batch_op.drop_index('ix_stock_movements_product_date')
+
+    op.drop_table('stock_movements')
+    op.drop_table('stock_checkpoints')
+    op.drop_table('invoice_sequences')
+    with op.batch_alter_table('idempotency_keys', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_idempotency_keys_expires_at'))
+
+    op.drop_table('idempotency_keys')
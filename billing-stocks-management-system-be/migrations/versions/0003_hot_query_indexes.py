@@ -0,0 +1,59 @@
+"""Indexes for the date-range and foreign key filters used by listings and reports
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_category_id'), ['category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_vendor_id'), ['vendor_id'], unique=False)
+
+    with op.batch_alter_table('purchase_items', schema=None) as batch_op:
+        batch_op.create_index('ix_purchase_items_product_purchase', ['product_id', 'purchase_id'], unique=False)
+        batch_op.create_index('ix_purchase_items_purchase_id', ['purchase_id'], unique=False)
+
+    with op.batch_alter_table('purchases', schema=None) as batch_op:
+        batch_op.create_index('ix_purchases_purchase_date', ['purchase_date'], unique=False)
+        batch_op.create_index('ix_purchases_vendor_date', ['vendor_id', 'purchase_date'], unique=False)
+
+    with op.batch_alter_table('sale_items', schema=None) as batch_op:
+        batch_op.create_index('ix_sale_items_product_sale', ['product_id', 'sale_id'], unique=False)
+        batch_op.create_index('ix_sale_items_sale_id', ['sale_id'], unique=False)
+
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.create_index('ix_sales_customer_date', ['customer_id', 'sale_date'], unique=False)
+        batch_op.create_index('ix_sales_sale_date', ['sale_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_index('ix_sales_sale_date')
+        batch_op.drop_index('ix_sales_customer_date')
+
+    with op.batch_alter_table('sale_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_sale_items_sale_id')
+        batch_op.drop_index('ix_sale_items_product_sale')
+
+    with op.batch_alter_table('purchases', schema=None) as batch_op:
+        batch_op.drop_index('ix_purchases_vendor_date')
+        batch_op.drop_index('ix_purchases_purchase_date')
+
+    with op.batch_alter_table('purchase_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_purchase_items_purchase_id')
+        batch_op.drop_index('ix_purchase_items_product_purchase')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_vendor_id'))
+        batch_op.drop_index(batch_op.f('ix_products_category_id'))
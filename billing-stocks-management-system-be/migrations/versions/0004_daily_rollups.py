@@ -0,0 +1,127 @@
+"""Daily sales and purchase rollups for the reports
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:15:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+SALE_PAYMENT_METHODS = ('cash', 'credit', 'upi', 'card')
+PURCHASE_PAYMENT_METHODS = ('cash', 'credit', 'upi', 'bank_transfer')
+
+
+def payment_sums(method_column, amount_column, methods):
+    """SUM(CASE ...) columns splitting an amount by payment method, then everything else"""
+    return [
+        sa.func.coalesce(sa.func.sum(sa.case((method_column == method, amount_column), else_=0)), 0)
+        for method in methods
+    ] + [
+        sa.func.coalesce(sa.func.sum(sa.case((method_column.in_(methods), 0), else_=amount_column)), 0)
+    ]
+
+
+def upgrade():
+    daily_sales_rollup = op.create_table('daily_sales_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rollup_date', sa.Date(), nullable=False),
+    sa.Column('bill_count', sa.Integer(), nullable=False),
+    sa.Column('subtotal', sa.Float(), nullable=False),
+    sa.Column('discount', sa.Float(), nullable=False),
+    sa.Column('gst_amount', sa.Float(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('cash_amount', sa.Float(), nullable=False),
+    sa.Column('credit_amount', sa.Float(), nullable=False),
+    sa.Column('upi_amount', sa.Float(), nullable=False),
+    sa.Column('card_amount', sa.Float(), nullable=False),
+    sa.Column('other_amount', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('rollup_date', name='uq_daily_sales_rollup_date')
+    )
+    daily_purchase_rollup = op.create_table('daily_purchase_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rollup_date', sa.Date(), nullable=False),
+    sa.Column('bill_count', sa.Integer(), nullable=False),
+    sa.Column('gst_amount', sa.Float(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('cash_amount', sa.Float(), nullable=False),
+    sa.Column('credit_amount', sa.Float(), nullable=False),
+    sa.Column('upi_amount', sa.Float(), nullable=False),
+    sa.Column('bank_transfer_amount', sa.Float(), nullable=False),
+    sa.Column('other_amount', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('rollup_date', name='uq_daily_purchase_rollup_date')
+    )
+
+    # Backfill one row per day from the existing bills
+    now = datetime.utcnow()
+    sales = sa.table(
+        'sales',
+        sa.column('id', sa.Integer),
+        sa.column('sale_date', sa.Date),
+        sa.column('subtotal', sa.Float),
+        sa.column('discount', sa.Float),
+        sa.column('gst_amount', sa.Float),
+        sa.column('total_amount', sa.Float),
+        sa.column('payment_method', sa.String)
+    )
+    op.execute(daily_sales_rollup.insert().from_select(
+        ['rollup_date', 'updated_at', 'bill_count', 'subtotal', 'discount', 'gst_amount', 'total_amount']
+        + [f'{method}_amount' for method in SALE_PAYMENT_METHODS + ('other',)],
+        sa.select(
+            sales.c.sale_date,
+            sa.literal(now),
+            sa.func.count(sales.c.id),
+            sa.func.coalesce(sa.func.sum(sales.c.subtotal), 0),
+            sa.func.coalesce(sa.func.sum(sales.c.discount), 0),
+            sa.func.coalesce(sa.func.sum(sales.c.gst_amount), 0),
+            sa.func.coalesce(sa.func.sum(sales.c.total_amount), 0),
+            *payment_sums(sales.c.payment_method, sales.c.total_amount, SALE_PAYMENT_METHODS)
+        ).group_by(sales.c.sale_date)
+    ))
+
+    purchases = sa.table(
+        'purchases',
+        sa.column('id', sa.Integer),
+        sa.column('purchase_date', sa.Date),
+        sa.column('total_amount', sa.Float),
+        sa.column('payment_method', sa.String)
+    )
+    purchase_items = sa.table(
+        'purchase_items',
+        sa.column('purchase_id', sa.Integer),
+        sa.column('gst_amount', sa.Float)
+    )
+    purchase_gst = sa.select(
+        purchase_items.c.purchase_id, sa.func.sum(purchase_items.c.gst_amount).label('gst_amount')
+    ).group_by(purchase_items.c.purchase_id).subquery()
+    op.execute(daily_purchase_rollup.insert().from_select(
+        ['rollup_date', 'updated_at', 'bill_count', 'gst_amount', 'total_amount']
+        + [f'{method}_amount' for method in PURCHASE_PAYMENT_METHODS + ('other',)],
+        sa.select(
+            purchases.c.purchase_date,
+            sa.literal(now),
+            sa.func.count(purchases.c.id),
+            sa.func.coalesce(sa.func.sum(purchase_gst.c.gst_amount), 0),
+            sa.func.coalesce(sa.func.sum(purchases.c.total_amount), 0),
+            *payment_sums(purchases.c.payment_method, purchases.c.total_amount, PURCHASE_PAYMENT_METHODS)
+        ).outerjoin(purchase_gst, purchase_gst.c.purchase_id == purchases.c.id)
+        .group_by(purchases.c.purchase_date)
+    ))
+
+
+def downgrade():
+    op.drop_table('daily_purchase_rollup')
+    op.drop_table('daily_sales_rollup')
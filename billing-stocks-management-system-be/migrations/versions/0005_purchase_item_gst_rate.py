@@ -0,0 +1,73 @@
+"""GST rate on purchase lines, backfilled from their GST and taxable amounts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import numpy as np
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+# GST slabs in percent, as in app/services/pricing.py at the time of this migration
+GST_SLABS = np.array([0, 0.1, 0.25, 1.5, 3, 5, 12, 18, 28, 40])
+BACKFILL_CHUNK_SIZE = 50000
+
+
+def infer_gst_rates(taxable, gst):
+    """Nearest slab when within two paise of rounding error, otherwise the ratio rounded to 2 places"""
+    ratio = np.divide(gst * 100, taxable, out=np.zeros_like(gst), where=taxable > 0)
+    nearest = GST_SLABS[np.abs(ratio[:, None] - GST_SLABS[None, :]).argmin(axis=1)]
+    tolerance = np.divide(2.0, taxable, out=np.zeros_like(taxable), where=taxable > 0) + 0.01
+    return np.where(np.abs(ratio - nearest) <= tolerance, nearest, np.round(ratio, 2))
+
+
+def upgrade():
+    with op.batch_alter_table('purchase_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gst_percentage', sa.Float(), nullable=True))
+
+    # Backfill the existing lines chunk by chunk, inferring each chunk's rates in one NumPy pass
+    bind = op.get_bind()
+    purchase_items = sa.table(
+        'purchase_items',
+        sa.column('id', sa.Integer),
+        sa.column('gst_percentage', sa.Float),
+        sa.column('gst_amount', sa.Float),
+        sa.column('total_price', sa.Float)
+    )
+    # One UPDATE per distinct rate in a chunk; the ids are inlined, so no bound-parameter limit applies
+    update = purchase_items.update().where(
+        purchase_items.c.id.in_(sa.bindparam('item_ids', expanding=True, literal_execute=True))
+    ).values(gst_percentage=sa.bindparam('rate'))
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(purchase_items.c.id, purchase_items.c.total_price, purchase_items.c.gst_amount)
+            .where(purchase_items.c.id > last_id)
+            .order_by(purchase_items.c.id)
+            .limit(BACKFILL_CHUNK_SIZE)
+        ).all()
+        if not rows:
+            break
+        item_ids, total_price, gst_amount = zip(*rows)
+        item_ids = np.array(item_ids, dtype=np.int64)
+        gst_amount = np.nan_to_num(np.array(gst_amount, dtype=np.float64))
+        taxable = np.nan_to_num(np.array(total_price, dtype=np.float64)) - gst_amount
+        rates = infer_gst_rates(taxable, gst_amount)
+        for rate in np.unique(rates):
+            bind.execute(update, {'rate': float(rate), 'item_ids': item_ids[rates == rate].tolist()})
+        last_id = int(item_ids[-1])
+
+
+def downgrade():
+    with op.batch_alter_table('purchase_items', schema=None) as batch_op:
+        batch_op.drop_column('gst_percentage')
@@ -0,0 +1,27 @@
+"""Record whether a sale was charged IGST (inter-state) or CGST + SGST
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 09:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing sales were not recorded as inter-state, so they stay intra-state (CGST + SGST)
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_interstate', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('sales', schema=None) as batch_op:
+        batch_op.drop_column('is_interstate')
@@ -0,0 +1,43 @@
+"""Store the daily rollup amounts as integer paise
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+AMOUNT_COLUMNS = {
+    'daily_sales_rollup': ['subtotal', 'discount', 'gst_amount', 'total_amount', 'cash_amount',
+                           'credit_amount', 'upi_amount', 'card_amount', 'other_amount'],
+    'daily_purchase_rollup': ['gst_amount', 'total_amount', 'cash_amount', 'credit_amount',
+                              'upi_amount', 'bank_transfer_amount', 'other_amount']
+}
+
+
+def upgrade():
+    # Rupees to paise; a float sum is within a fraction of a paisa of the exact one
+    for table, columns in AMOUNT_COLUMNS.items():
+        op.execute(f"UPDATE {table} SET " + ', '.join(f'{column} = ROUND({column} * 100)' for column in columns))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.Float(), type_=sa.BigInteger(),
+                                      existing_nullable=False, postgresql_using=f'{column}::bigint')
+
+
+def downgrade():
+    for table, columns in AMOUNT_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for column in columns:
+                batch_op.alter_column(column, existing_type=sa.BigInteger(), type_=sa.Float(),
+                                      existing_nullable=False, postgresql_using=f'{column}::double precision')
+        op.execute(f"UPDATE {table} SET " + ', '.join(f'{column} = {column} / 100.0' for column in columns))
@@ -0,0 +1,71 @@
+"""Benchmark cart pricing for carts of 10 to 10,000 lines.
+
+Prices random carts with the vectorized engine (price_cart) and through the
+billing API's validation and pricing step (price_items), and prints the time per
+cart and per line. Linear scaling shows up as a flat time per line.
+
+    python scripts/bench_pricing.py [--sizes 10,100,1000,10000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.api.billing import price_items  # noqa: E402
+from app.services.pricing import price_cart  # noqa: E402
+
+CatalogProduct = namedtuple('CatalogProduct', ['selling_price', 'gst_percentage'])
+
+
+def make_cart(lines, rng):
+    """Return (items, products) for a random cart with the given number of lines"""
+    products = {
+        product_id: CatalogProduct(round(rng.uniform(1, 5000), 2), rng.choice([0, 5, 18, 40]))
+        for product_id in range(1, min(lines, 2000) + 1)
+    }
+    items = [{
+        'product_id': rng.randint(1, len(products)),
+        'quantity': rng.randint(1, 50),
+        'discount': rng.choice([0, 0, 0.5, 2])
+    } for _ in range(lines)]
+    return items, products
+
+
+def best_time(function, repeat):
+    """Return the fastest of `repeat` runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', default='10,100,1000,10000', help='cart sizes in lines, comma-separated')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per size; the fastest is reported')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    print(f"{'lines':>8} {'price_cart ms':>14} {'us/line':>8} {'price_items ms':>15} {'us/line':>8}")
+    for lines in [int(size) for size in args.sizes.split(',')]:
+        items, products = make_cart(lines, rng)
+        columns = (
+            [products[item['product_id']].selling_price for item in items],
+            [item['quantity'] for item in items],
+            [item['discount'] for item in items],
+            [products[item['product_id']].gst_percentage for item in items]
+        )
+        engine = best_time(lambda: price_cart(*columns), args.repeat)
+        full = best_time(lambda: price_items(items, products), args.repeat)
+        print(f"{lines:>8} {engine * 1000:>14.3f} {engine / lines * 1e6:>8.2f} "
+              f"{full * 1000:>15.3f} {full / lines * 1e6:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
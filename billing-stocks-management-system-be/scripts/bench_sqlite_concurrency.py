@@ -0,0 +1,164 @@
+"""Benchmark concurrent billing on SQLite with and without the engine profile.
+
+Each run builds a fresh file database from the migrations with 2,000 products,
+then N threads alternate POST /api/billing/sales (2 items) and
+GET /api/billing/sales?limit=20 for a fixed time. With --report, one more thread
+keeps a long report-style read open the whole time. "default" runs with stock
+SQLAlchemy settings (rollback journal, no busy timeout), "profile" with the
+WAL/pragma profile and pool from app/services/database.py. Every configuration
+runs in its own process, so per-worker caches and invoice number blocks start
+empty.
+
+    python scripts/bench_sqlite_concurrency.py [--threads 1,4,8] [--duration 10] [--report]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PROJECT_DIR)
+
+PRODUCTS = 2000
+REPORT_QUERY = (
+    'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 2000000) '
+    'SELECT count(*) FROM c, (SELECT id FROM products LIMIT 1)'
+)
+
+
+def build_app(database_path, config, threads):
+    """Return an app on a new, migrated and seeded database"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database_path}'
+    os.environ.pop('DATABASE_REPLICA_URL', None)
+    os.environ['SQLITE_POOL_SIZE'] = str(2 * threads)
+    os.environ['SQLITE_POOL_MAX_OVERFLOW'] = str(threads)
+
+    from app.services import database
+    if config == 'default':
+        # Stock SQLAlchemy engine: no pool sizing and no connect-time pragmas
+        database.engine_options = lambda config, database_uri=None: {}
+        database.configure_engine = lambda engine, config: None
+
+    from flask_migrate import upgrade
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.models import Product
+
+    app = create_app()
+    app.logger.disabled = True
+    with app.app_context():
+        upgrade(directory=os.path.join(PROJECT_DIR, 'migrations'))
+        db.session.execute(insert(Product), [{
+            'name': f'Product {i}', 'sku': f'SKU{i}', 'barcode': f'BC{i}',
+            'selling_price': 10, 'purchase_price': 5, 'stock_quantity': 10 ** 6, 'gst_percentage': 18
+        } for i in range(PRODUCTS)])
+        db.session.commit()
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    return app, journal_mode
+
+
+def run(config, threads, duration, report):
+    """Run one configuration and return its results"""
+    from flask_jwt_extended import create_access_token
+    from app import db
+
+    with tempfile.TemporaryDirectory() as directory:
+        app, journal_mode = build_app(os.path.join(directory, 'bench.db'), config, threads)
+        with app.app_context():
+            headers = {'Authorization': 'Bearer ' + create_access_token(identity='1', additional_claims={'role': 'admin'})}
+
+        lock = threading.Lock()
+        counts = Counter()
+        errors = Counter()
+        latencies = []
+
+        def biller(seed):
+            rng = random.Random(seed)
+            client = app.test_client()
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                if rng.random() < 0.5:
+                    kind = 'sales'
+                    response = client.post('/api/billing/sales', headers=headers, json={'items': [
+                        {'product_id': rng.randint(1, PRODUCTS), 'quantity': 1},
+                        {'product_id': rng.randint(1, PRODUCTS), 'quantity': 2}
+                    ]})
+                    ok = response.status_code == 201
+                else:
+                    kind = 'reads'
+                    response = client.get('/api/billing/sales?limit=20', headers=headers)
+                    ok = response.status_code == 200
+                with lock:
+                    if ok:
+                        counts[kind] += 1
+                        if kind == 'sales':
+                            latencies.append(time.perf_counter() - start)
+                    else:
+                        errors[str((response.get_json() or {}).get('error', response.status_code))[:60]] += 1
+
+        def reporter():
+            end = time.perf_counter() + duration
+            while time.perf_counter() < end:
+                with app.app_context():
+                    db.session.execute(db.text(REPORT_QUERY)).scalar()
+                    db.session.rollback()
+
+        workers = [threading.Thread(target=biller, args=(seed,)) for seed in range(threads)]
+        if report:
+            workers.append(threading.Thread(target=reporter))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    latencies.sort()
+    return {
+        'config': config,
+        'journal_mode': journal_mode,
+        'threads': threads,
+        'report': report,
+        'sales_per_second': counts['sales'] / duration,
+        'reads_per_second': counts['reads'] / duration,
+        'errors': dict(errors),
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--threads', default='1,4,8', help='billing threads, comma-separated')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per configuration')
+    parser.add_argument('--report', action='store_true', help='also run every thread count with a long report read')
+    parser.add_argument('--run', nargs=3, metavar=('CONFIG', 'THREADS', 'REPORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        config, threads, report = args.run
+        print(json.dumps(run(config, int(threads), args.duration, report == 'yes')))
+        return
+
+    print(f"{'threads':>7} {'report':>6} {'config':>8} {'journal':>8} {'sales/s':>8} {'reads/s':>8} {'p99 ms':>7}  errors")
+    for report in ['no', 'yes'] if args.report else ['no']:
+        for threads in [int(count) for count in args.threads.split(',')]:
+            for config in ('default', 'profile'):
+                output = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--duration', str(args.duration),
+                     '--run', config, str(threads), report],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                p99 = f"{result['p99_ms']:.0f}" if result['p99_ms'] is not None else '-'
+                errors = ', '.join(f'{count} x {message}' for message, count in result['errors'].items()) or '0'
+                print(f"{threads:>7} {report:>6} {config:>8} {result['journal_mode']:>8} "
+                      f"{result['sales_per_second']:>8.1f} {result['reads_per_second']:>8.1f} {p99:>7}  {errors}")
+
+
+if __name__ == '__main__':
+    main()
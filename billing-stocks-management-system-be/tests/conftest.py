@@ -0,0 +1,100 @@
+import os
+import shutil
+import uuid
+import pytest
+from contextlib import contextmanager
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from app import create_app, db
+from app.api import backup as backup_api
+from app.services.catalog import invalidate_catalog
+from app.services.invoice_numbers import reset_invoice_numbers
+from app.services.product_matcher import reset_matcher
+from app.services.report_cache import invalidate_reports
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'migrations')
+
+# Tests run on SQLite by default. Set TEST_DATABASE_URL to a PostgreSQL server, e.g.
+# postgresql://postgres@127.0.0.1:5432/billing_stocks, to run them there instead:
+# every test then gets a scratch database named after that one, dropped afterwards.
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """URL of an empty database for one test"""
+    if not TEST_DATABASE_URL:
+        yield f"sqlite:///{tmp_path / 'test.db'}"
+        return
+
+    url = make_url(TEST_DATABASE_URL)
+    name = f'{url.database}_test_{uuid.uuid4().hex[:8]}'
+    server = create_engine(url, isolation_level='AUTOCOMMIT')
+    with server.connect() as connection:
+        connection.execute(text(f'CREATE DATABASE "{name}"'))
+    try:
+        yield url.set(database=name).render_as_string(hide_password=False)
+    finally:
+        with server.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        server.dispose()
+
+
+@pytest.fixture
+def app(database_url, monkeypatch):
+    """App on a fresh database built by the migrations"""
+    monkeypatch.setenv('DATABASE_URL', database_url)
+    monkeypatch.delenv('DATABASE_REPLICA_URL', raising=False)
+    app = create_app()
+    app.config['TESTING'] = True
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        # Per-worker caches outlive the app; start every test from an empty database's view
+        invalidate_catalog()
+        reset_matcher()
+        invalidate_reports()
+        reset_invoice_numbers()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Authorization header for an admin user"""
+    token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def backup_folder(app, tmp_path, monkeypatch):
+    """Keep backups in tmp_path; skips on PostgreSQL when pg_dump is not in PG_BIN_DIR or on PATH"""
+    if db.engine.dialect.name == 'postgresql':
+        if not shutil.which(os.path.join(app.config['PG_BIN_DIR'], 'pg_dump')):
+            pytest.skip('pg_dump not found; set PG_BIN_DIR')
+    monkeypatch.setattr(backup_api, 'BACKUP_FOLDER', str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def count_queries(app):
+    """Context manager collecting the SQL statements run inside it"""
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db.engine
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    return counter
@@ -0,0 +1,28 @@
+from app import db
+from app.models import Product
+
+
+def test_restore_drops_cached_products(client, auth_headers, backup_folder):
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=10, gst_percentage=18)
+    db.session.add(product)
+    db.session.commit()
+    product_id = product.id
+
+    backup = client.post('/api/backup/', json={}, headers=auth_headers).get_json()['backup']
+
+    # Change the product and let the catalog cache and the matcher see the change
+    client.put(f'/api/inventory/products/{product_id}', json={'name': 'Tide 1kg', 'selling_price': 150}, headers=auth_headers)
+    quote = client.post('/api/billing/sales/quote', json={'items': [{'product_id': product_id}]}, headers=auth_headers)
+    assert quote.get_json()['items'][0]['unit_price'] == 150
+    matches = client.post('/api/inventory/products/match', json={'text': 'tide'}, headers=auth_headers).get_json()
+    assert matches[0]['candidates'][0]['name'] == 'Tide 1kg'
+
+    response = client.post('/api/backup/restore', json={'backup_id': backup['id']}, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+
+    # Served from the restored database, not from the caches
+    quote = client.post('/api/billing/sales/quote', json={'items': [{'product_id': product_id}]}, headers=auth_headers)
+    assert quote.get_json()['items'][0]['unit_price'] == 100
+    matches = client.post('/api/inventory/products/match', json={'text': 'surf excel'}, headers=auth_headers).get_json()
+    assert matches[0]['candidates'][0]['name'] == 'Surf Excel 1kg'
+    assert client.post('/api/inventory/products/match', json={'text': 'tide'}, headers=auth_headers).get_json()[0]['candidates'] == []
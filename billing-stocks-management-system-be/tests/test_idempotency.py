@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models import IdempotencyKey, Product, Sale
+
+
+def test_sale_after_key_expiry_is_created_again(app, client, auth_headers):
+    # A reservation per bill, so the retry has to reserve a number on its own connection
+    app.config['INVOICE_NUMBER_BLOCK_SIZE'] = 1
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=10, gst_percentage=18)
+    db.session.add(product)
+    db.session.commit()
+    sale = {'items': [{'product_id': product.id, 'quantity': 1}]}
+    headers = {**auth_headers, 'Idempotency-Key': 'sale-1'}
+
+    first = client.post('/api/billing/sales', json=sale, headers=headers)
+    assert first.status_code == 201, first.get_json()
+    replay = client.post('/api/billing/sales', json=sale, headers=headers)
+    assert replay.headers.get('Idempotent-Replayed') == 'true'
+
+    db.session.execute(db.update(IdempotencyKey).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.session.commit()
+    db.session.remove()
+
+    retry = client.post('/api/billing/sales', json=sale, headers=headers)
+    assert retry.status_code == 201, retry.get_json()
+    assert 'Idempotent-Replayed' not in retry.headers
+    assert retry.get_json()['sale']['invoice_number'] != first.get_json()['sale']['invoice_number']
+
+
+def test_batch_retry_replays_the_first_response(client, auth_headers):
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=10, gst_percentage=18)
+    db.session.add(product)
+    db.session.commit()
+    batch = {'sales': [{'items': [{'product_id': product.id, 'quantity': 1}]}] * 3}
+    headers = {**auth_headers, 'Idempotency-Key': 'batch-1'}
+
+    first = client.post('/api/billing/sales/batch', json=batch, headers=headers)
+    retry = client.post('/api/billing/sales/batch', json=batch, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers.get('Idempotent-Replayed') == 'true'
+    assert retry.get_json() == first.get_json()
+    assert Sale.query.count() == 3
+    assert Product.query.get(product.id).stock_quantity == 7
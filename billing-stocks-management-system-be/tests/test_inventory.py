@@ -0,0 +1,33 @@
+import pytest
+from app import db
+from app.models import Product, StockMovement
+
+
+def add_product(stock_quantity=10):
+    """Add a product and return its ID"""
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=stock_quantity)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_stock_update_accepts_numeric_strings(client, auth_headers):
+    product_id = add_product()
+
+    response = client.put(f'/api/inventory/products/{product_id}', json={'stock_quantity': '7'}, headers=auth_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['product']['stock_quantity'] == 7
+    db.session.remove()
+    adjustment = StockMovement.query.filter_by(product_id=product_id, movement_type='adjustment').one()
+    assert adjustment.quantity == -3
+
+
+@pytest.mark.parametrize('stock_quantity', ['seven', -1, 2.5, True, None])
+def test_stock_update_rejects_invalid_counts(client, auth_headers, stock_quantity):
+    product_id = add_product()
+
+    response = client.put(f'/api/inventory/products/{product_id}', json={'stock_quantity': stock_quantity}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert StockMovement.query.filter_by(product_id=product_id).count() == 0
@@ -0,0 +1,64 @@
+from datetime import date
+from app import db
+from app.models import Product, Sale
+from app.services.invoice_numbers import financial_year, format_invoice_number
+
+
+def add_product():
+    """Add a product with plenty of stock and return its ID"""
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=100, gst_percentage=18)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def invoice_number(number):
+    """Format an INV number for today's financial year"""
+    return format_invoice_number('INV', financial_year(date.today()), number)
+
+
+def create_sale(client, headers, product_id):
+    """Create a one-line sale and return its invoice number"""
+    response = client.post('/api/billing/sales', json={'items': [{'product_id': product_id}]}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['sale']['invoice_number']
+
+
+def test_generated_number_collision_is_retried(client, auth_headers):
+    product_id = add_product()
+    assert create_sale(client, auth_headers, product_id) == invoice_number(1)
+
+    # Another worker took this worker's next number, e.g. from the sequence of a restored backup
+    db.session.add(Sale(invoice_number=invoice_number(2), sale_date=date.today(), subtotal=0, total_amount=0))
+    db.session.commit()
+    db.session.remove()
+
+    assert create_sale(client, auth_headers, product_id) == invoice_number(3)
+    assert Product.query.get(product_id).stock_quantity == 98
+
+
+def test_restore_forgets_reserved_numbers(client, auth_headers, backup_folder):
+    product_id = add_product()
+    backup = client.post('/api/backup/', json={}, headers=auth_headers).get_json()['backup']
+    assert create_sale(client, auth_headers, product_id) == invoice_number(1)
+
+    response = client.post('/api/backup/restore', json={'backup_id': backup['id']}, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+
+    # Numbering restarts from the restored sequence instead of the block reserved before
+    assert create_sale(client, auth_headers, product_id) == invoice_number(1)
+
+
+def test_generated_number_collision_is_retried_in_batches(client, auth_headers):
+    product_id = add_product()
+    db.session.add(Sale(invoice_number=invoice_number(2), sale_date=date.today(), subtotal=0, total_amount=0))
+    db.session.commit()
+    db.session.remove()
+
+    sale = {'items': [{'product_id': product_id}]}
+    response = client.post('/api/billing/sales/batch', json={'sales': [sale, sale, sale]}, headers=auth_headers)
+
+    # Numbers 1-3 are allocated up front; only the bill that got number 2 needs a fresh one
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['created'] * 3
+    assert [result['invoice_number'] for result in results] == [invoice_number(1), invoice_number(4), invoice_number(3)]
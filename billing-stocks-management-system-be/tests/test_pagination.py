@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime
+from app import db
+from app.models import Product
+
+
+def add_products(stock_quantities):
+    """Add one product per stock quantity (None leaves it empty); returns their IDs"""
+    products = [
+        Product(name=f'Product {index}', selling_price=100, purchase_price=60, stock_quantity=stock_quantity or 0)
+        for index, stock_quantity in enumerate(stock_quantities)
+    ]
+    db.session.add_all(products)
+    db.session.flush()
+    # The model defaults an empty count to 0, so clear those afterwards
+    empty = [product.id for product, stock_quantity in zip(products, stock_quantities) if stock_quantity is None]
+    db.session.execute(db.update(Product).where(Product.id.in_(empty)).values(stock_quantity=None))
+    db.session.commit()
+    return [product.id for product in products]
+
+
+def all_pages(client, headers, url):
+    """Follow X-Next-Cursor from the first page to the last; returns every row"""
+    rows = []
+    cursor = None
+    while True:
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''), headers=headers)
+        assert response.status_code == 200, response.get_json()
+        rows.extend(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return rows
+
+
+@pytest.mark.parametrize('sort', ['stock_quantity', '-stock_quantity'])
+def test_pages_continue_through_null_sort_values(client, auth_headers, sort):
+    add_products([5, None, 3, None, 5, None, 1])
+
+    rows = all_pages(client, auth_headers, f'/api/inventory/products?limit=2&sort={sort}')
+
+    unpaged = client.get(f'/api/inventory/products?sort={sort}', headers=auth_headers).get_json()
+    assert [row['id'] for row in rows] == [row['id'] for row in unpaged]
+    assert len(rows) == 7
+    quantities = [row['stock_quantity'] for row in rows]
+    assert quantities == ([1, 3, 5, 5, None, None, None] if sort == 'stock_quantity' else [None, None, None, 5, 5, 3, 1])
+
+
+def test_pages_continue_through_null_created_at(client, auth_headers):
+    ids = add_products([1, 2, 3, 4])
+    db.session.execute(db.update(Product).where(Product.id.in_(ids[1:3])).values(created_at=None))
+    db.session.execute(db.update(Product).where(Product.id == ids[3]).values(created_at=datetime(2026, 1, 1)))
+    db.session.commit()
+
+    rows = all_pages(client, auth_headers, '/api/inventory/products?limit=1&sort=created_at&fields=id,name')
+
+    assert [row['id'] for row in rows] == [ids[3], ids[0], ids[1], ids[2]]
+
+
+def test_unpaged_request_returns_every_row(app, client, auth_headers):
+    app.config['PAGE_SIZE_DEFAULT'] = 2
+    add_products([1, 2, 3, 4, 5])
+
+    response = client.get('/api/inventory/products', headers=auth_headers)
+
+    assert len(response.get_json()) == 5
+    assert 'X-Next-Cursor' not in response.headers
+    assert len(client.get('/api/inventory/products?limit=2', headers=auth_headers).get_json()) == 2
@@ -0,0 +1,44 @@
+import io
+from app import db
+from app.api import speech as speech_api
+from app.models import Product
+
+
+def add_product(name):
+    """Add a product and return its ID"""
+    product = Product(name=name, selling_price=100, purchase_price=60, stock_quantity=10, gst_percentage=18)
+    db.session.add(product)
+    db.session.commit()
+    return product.id
+
+
+def test_match_drops_products_deleted_by_another_worker(app, client, auth_headers):
+    app.config['CATALOG_CACHE_TTL_SECONDS'] = 0
+    add_product('Surf Excel 1kg')
+    product_id = add_product('Surf Excel 500g')
+    matches = client.post('/api/inventory/products/match', json={'text': 'surf excel'}, headers=auth_headers).get_json()
+    assert len(matches[0]['candidates']) == 2
+
+    # Deleted behind the API's back, as another worker would
+    db.session.execute(db.delete(Product).where(Product.id == product_id))
+    db.session.commit()
+    db.session.remove()
+
+    matches = client.post('/api/inventory/products/match', json={'text': 'surf excel'}, headers=auth_headers).get_json()
+    assert [candidate['name'] for candidate in matches[0]['candidates']] == ['Surf Excel 1kg']
+
+
+def test_speech_matches_products_on_request(client, auth_headers, tmp_path, monkeypatch):
+    monkeypatch.setattr(speech_api, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(speech_api, 'recognize_with_sr', lambda file_path, language: {'text': 'two surf excel'})
+    add_product('Surf Excel 1kg')
+
+    response = client.post('/api/speech/recognize', headers=auth_headers, data={
+        'file': (io.BytesIO(b'audio'), 'order.wav'),
+        'match_products': 'true'
+    })
+
+    assert response.status_code == 200, response.get_json()
+    products = response.get_json()['products']
+    assert products[0]['quantity'] == 2
+    assert products[0]['candidates'][0]['name'] == 'Surf Excel 1kg'
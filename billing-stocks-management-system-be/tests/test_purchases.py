@@ -0,0 +1,31 @@
+import pytest
+from app import db
+from app.models import Product, PurchaseItem, Vendor
+
+
+def add_vendor_and_product():
+    """Add a vendor and a product; returns their IDs"""
+    vendor = Vendor(name='Vendor')
+    product = Product(name='Surf Excel 1kg', selling_price=100, purchase_price=60, stock_quantity=0)
+    db.session.add_all([vendor, product])
+    db.session.commit()
+    return vendor.id, product.id
+
+
+@pytest.mark.parametrize('gst', [
+    {'gst_percentage': 18},
+    {'gst_amount': 18},
+    {'gst_percentage': 18, 'gst_amount': 18}
+])
+def test_purchase_line_gst_rate_and_amount(client, auth_headers, gst):
+    vendor_id, product_id = add_vendor_and_product()
+
+    response = client.post('/api/billing/purchases', headers=auth_headers, json={
+        'vendor_id': vendor_id,
+        'items': [{'product_id': product_id, 'quantity': 2, 'unit_price': 50, **gst}]
+    })
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['purchase']['total_amount'] == 118
+    item = PurchaseItem.query.one()
+    assert (item.gst_percentage, item.gst_amount) == (18, 18)
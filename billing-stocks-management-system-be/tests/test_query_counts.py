@@ -0,0 +1,112 @@
+import pytest
+from datetime import date
+from app import db
+from app.models import Customer, Product, Purchase, PurchaseItem, Sale, SaleItem, Vendor
+from app.services.report_cache import invalidate_reports
+
+# Listing, detail and GST report endpoints must run a fixed number of statements,
+# however many rows they return: each bill and line below has its own customer,
+# vendor and product, so a lazy load per row would show up as extra statements.
+
+BILL_DATE = date(2026, 1, 15)
+
+
+def add_sales(count, lines):
+    """Add `count` sales of `lines` lines, each with its own customer and products; returns their IDs"""
+    sales = []
+    for _ in range(count):
+        sale = Sale(
+            invoice_number=f'T-{len(sales)}-{Sale.query.count()}',
+            customer=Customer(name='Customer', gst_number='29ABCDE1234F1Z5'),
+            sale_date=BILL_DATE,
+            subtotal=100 * lines, discount=0, gst_amount=18 * lines, total_amount=118 * lines
+        )
+        for _ in range(lines):
+            sale.items.append(SaleItem(
+                product=Product(name='Product', selling_price=100, purchase_price=60, hsn_code='3401'),
+                quantity=1, unit_price=100, gst_percentage=18, gst_amount=18, discount=0, total_price=118
+            ))
+        db.session.add(sale)
+        db.session.flush()
+        sales.append(sale.id)
+    db.session.commit()
+    return sales
+
+
+def add_purchases(count, lines):
+    """Add `count` purchases of `lines` lines, each with its own vendor and products; returns their IDs"""
+    purchases = []
+    for _ in range(count):
+        purchase = Purchase(
+            invoice_number=f'P-{len(purchases)}-{Purchase.query.count()}',
+            vendor=Vendor(name='Vendor'),
+            purchase_date=BILL_DATE,
+            total_amount=118 * lines
+        )
+        for _ in range(lines):
+            purchase.items.append(PurchaseItem(
+                product=Product(name='Product', selling_price=100, purchase_price=60, hsn_code='3401'),
+                quantity=1, unit_price=100, gst_percentage=18, gst_amount=18, total_price=118
+            ))
+        db.session.add(purchase)
+        db.session.flush()
+        purchases.append(purchase.id)
+    db.session.commit()
+    return purchases
+
+
+def statements_for(client, headers, count_queries, url):
+    """Return the statements one GET request runs, checking that it succeeds"""
+    # Requests share the test's app context; start from an empty session as a real request would
+    db.session.remove()
+    with count_queries() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', ['/api/billing/sales', '/api/billing/purchases'])
+def test_listing_statements_do_not_grow_with_rows(client, auth_headers, count_queries, url):
+    add_sales(2, 1)
+    add_purchases(2, 1)
+    few = statements_for(client, auth_headers, count_queries, url)
+
+    add_sales(40, 1)
+    add_purchases(40, 1)
+    many = statements_for(client, auth_headers, count_queries, url)
+
+    assert many == few
+
+
+def test_sale_detail_statements_do_not_grow_with_lines(client, auth_headers, count_queries):
+    small, large = add_sales(1, 2)[0], add_sales(1, 40)[0]
+
+    few = statements_for(client, auth_headers, count_queries, f'/api/billing/sales/{small}')
+    many = statements_for(client, auth_headers, count_queries, f'/api/billing/sales/{large}')
+
+    assert many == few
+
+
+def test_purchase_detail_statements_do_not_grow_with_lines(client, auth_headers, count_queries):
+    small, large = add_purchases(1, 2)[0], add_purchases(1, 40)[0]
+
+    few = statements_for(client, auth_headers, count_queries, f'/api/billing/purchases/{small}')
+    many = statements_for(client, auth_headers, count_queries, f'/api/billing/purchases/{large}')
+
+    assert many == few
+
+
+@pytest.mark.parametrize('report', ['gst?type=both', 'gst/hsn?'])
+def test_gst_report_statements_do_not_grow_with_rows(client, auth_headers, count_queries, report):
+    url = f'/api/reports/{report}&start_date=2026-01-01&end_date=2026-01-31'
+    add_sales(2, 2)
+    add_purchases(2, 2)
+    few = statements_for(client, auth_headers, count_queries, url)
+
+    add_sales(30, 3)
+    add_purchases(30, 3)
+    # The rows were added behind the API's back, so drop the cached report
+    invalidate_reports()
+    many = statements_for(client, auth_headers, count_queries, url)
+
+    assert many == few
@@ -0,0 +1,30 @@
+from datetime import date
+from app import db
+from app.models import Sale
+from app.services.rollups import record_sales
+
+# A closed period, so only the rollup check can drop its cached report
+URL = '/api/reports/sales?type=daily&start_date=2026-01-01&end_date=2026-01-31'
+
+
+def add_sale_from_another_worker(total):
+    """Save a backdated sale the way billing does, without touching this worker's report cache"""
+    sale = Sale(invoice_number=f'W2-{total}', sale_date=date(2026, 1, 10),
+                subtotal=total, discount=0, gst_amount=0, total_amount=total, payment_method='cash')
+    db.session.add(sale)
+    db.session.flush()
+    record_sales([sale])
+    db.session.commit()
+    db.session.remove()
+
+
+def test_closed_period_report_sees_bills_from_other_workers(client, auth_headers):
+    add_sale_from_another_worker(100)
+    assert client.get(URL, headers=auth_headers).get_json()['summary']['total_amount'] == 100
+
+    # Unchanged rollups: served from the cache
+    assert client.get(URL, headers=auth_headers).get_json()['summary']['total_amount'] == 100
+    assert client.get('/api/reports/cache/stats', headers=auth_headers).get_json()['hits'] == 1
+
+    add_sale_from_another_worker(50)
+    assert client.get(URL, headers=auth_headers).get_json()['summary']['total_amount'] == 150
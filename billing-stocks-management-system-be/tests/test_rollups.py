@@ -0,0 +1,40 @@
+from datetime import date
+from app import db
+from app.models import DailySalesRollup, Sale
+from app.services.rollups import rebuild_rollups, record_sales
+
+BILL_DATE = date(2026, 1, 10)
+
+
+def add_sales(total, count):
+    """Save `count` sales of `total` rupees one at a time, as billing does"""
+    for index in range(count):
+        sale = Sale(invoice_number=f'R-{index}', sale_date=BILL_DATE, subtotal=total, discount=0,
+                    gst_amount=0, total_amount=total, payment_method='upi')
+        db.session.add(sale)
+        db.session.flush()
+        record_sales([sale])
+        db.session.commit()
+
+
+def test_rollup_totals_do_not_drift(client, auth_headers):
+    # 0.1 added 30 times as a float is 3.0000000000000013
+    add_sales(0.1, 30)
+
+    rollup = DailySalesRollup.query.one()
+    assert (rollup.total_amount, rollup.upi_amount, rollup.bill_count) == (300, 300, 30)
+
+    report = client.get('/api/reports/sales?type=daily&start_date=2026-01-01&end_date=2026-01-31', headers=auth_headers)
+    body = report.get_json()
+    assert body['summary']['total_amount'] == 3.0
+    assert body['data'][0]['upi_amount'] == 3.0
+
+
+def test_rebuild_matches_incremental_rollup(app):
+    add_sales(33.33, 7)
+    incremental = DailySalesRollup.query.one().total_amount
+
+    rebuild_rollups()
+
+    db.session.remove()
+    assert DailySalesRollup.query.one().total_amount == incremental == 23331
@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.mark.parametrize('items', ['2 x surf', {'product_id': 1}, [1, 2]])
+def test_items_that_are_not_a_list_of_objects_are_rejected(client, auth_headers, items):
+    single = client.post('/api/billing/sales', json={'items': items}, headers=auth_headers)
+    batch = client.post('/api/billing/sales/batch', json={'sales': [{'items': items}]}, headers=auth_headers)
+
+    assert single.status_code == 400
+    assert single.get_json()['error'] == 'Items must be a list of objects'
+    assert batch.get_json()['results'][0]['error'] == 'Items must be a list of objects'